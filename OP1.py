@@ -21,7 +21,7 @@
 # Customization by: Abel Allison
 
 from functools import partial
-import time
+import os
 
 import Live
 
@@ -46,18 +46,27 @@ from _Framework.InputControlElement import *
 from _APC import ControlElementUtils as APCUtils
 from _APC.DetailViewCntrlComponent import DetailViewCntrlComponent
 
+from . import instrument
+from . import journal
+from . import connection
+from . import controls
+from . import governor
+from . import log
+from . import models
 from . import modes
+from . import output
+from . import profiler
+from . import scheduler
 from . import ui
 from .consts import *
 from .ShiftEnabledControl import ShiftEnabledControl
 from .util import color_to_bytes
 from .util import midi_bytes_to_values
+from .util import monotonic
 
 COLOR_BLACK_BYTES = [0x00, 0x00, 0x00]
 COLOR_WHITE_BYTES = [0x7F, 0x7F, 0x7F]
 
-CONNECTION_MAX_RETRIES = 5
-
 ENCODER_MODE = Live.MidiMap.MapMode.relative_two_compliment
 
 #
@@ -71,30 +80,79 @@ ID_SEQUENCE = (0xf0, 0x7e, 0x7f, 0x06, 0x01, 0xf7)
 
 class OP1(ControlSurface):
 	def __init__(self, *args, **kwargs):
+		# Timed tasks such as connection retries, flashes and blinks, run
+		# from `update_display`. Pass a `scheduler.VirtualClock` as `clock`
+		# to control time in tests and benchmarks.
+		self.scheduler = scheduler.Scheduler(kwargs.pop('clock', monotonic))
+
+		# Everything sent to the OP-1 goes through this queue, created
+		# first since the framework may send while initializing
+		self.midi_output = output.MidiOutputQueue(super(OP1, self)._send_midi, clock=self.scheduler.clock)
+		# Decides which display updates render a frame
+		self.frame_governor = governor.FrameGovernor(clock=self.scheduler.clock)
+
 		ControlSurface.__init__(self, *args, **kwargs)
 
-		self.log_message('__init__()')
+		self.logger = log.Logger(
+			self.log_message,
+			LOG_LEVEL,
+			ring_buffer_size=LOG_RING_BUFFER_SIZE,
+		)
+		self.logger.debug('__init__()')
 		self.show_message("Version: " + VERSION)
 
-		# Data for tracking connection attempts
-		self.device_connected = False
-		self.next_retry_delay = 1
-		self.next_retry_ts = None
-		self.retries_count = 0
+		# Latency histograms of listeners, written out with shift + help
+		self.instrumentation = instrument.Instrumentation(INSTRUMENT_HANDLERS)
+		self.instrumentation.wrap_methods(
+			self,
+			'on_mode_button',
+			'on_help_button',
+			'on_com_button',
+			'selected_scene_changed',
+			'clip_fired',
+			'selected_clip_deleted',
+		)
+
+		# Handshake and keepalive with the OP-1
+		self.connection = connection.DeviceConnection(
+			self.scheduler,
+			self.send_identity_request,
+			self.handle_device_connection_success,
+			self.handle_device_connection_lost,
+			self.logger,
+		)
 		self._current_midi_map = None
 
 		# State of display text
 		self.text_top = ''
 		self.text_bottom = ''
 
+		# Last frames sent to the display, only changed frames are re-sent
+		self.display_frames = ui.DisplayFrameDiffer(self._send_display_frame)
+		self.display_text_encoder = ui.DisplayTextEncoder()
+
 		# State of display key slots
 		self.display_color_by_slot_num = {}
 		for i in range(NUM_DISPLAY_CLIP_SLOTS):
 		 	self.display_color_by_slot_num[i] = COLOR_BLACK_BYTES
 
+		# Created first so indices are current when other selection
+		# listeners run
+		self._track_index = models.SelectionIndex(self.song(), 'tracks', 'selected_track')
+		self._scene_index = models.SelectionIndex(self.song(), 'scenes', 'selected_scene')
+
 		with self.component_guard():
 			self._build_components()
+			self.selected_track_model = models.SelectedTrackModel(self)
 			self.init_modes()
+
+		# Shift + com starts and stops profiling the script
+		self.profiler = profiler.ProfilerSession(os.path.dirname(os.path.abspath(__file__)))
+
+		# Recorder of incoming MIDI, see `start_midi_journal`
+		self._midi_journal = None
+		if MIDI_JOURNAL_PATH is not None:
+			self.start_midi_journal(os.path.join(os.path.dirname(__file__), MIDI_JOURNAL_PATH))
 	#
 	# Ableton Helpers
 	#
@@ -107,13 +165,18 @@ class OP1(ControlSurface):
 	def num_scenes(self):
 		return min(NUM_SCENES, len(self.song().scenes))
 
+	@property
+	def device_connected(self):
+		return self.connection.connected
+
 	@property
 	def selected_track(self):
 		return self.song().view.selected_track
 
 	@property
 	def selected_track_num(self):
-		return list(self.song().tracks).index(self.selected_track)
+		"""None when a return or master track is selected"""
+		return self._track_index.index
 
 	@property
 	def selected_scene(self):
@@ -121,7 +184,7 @@ class OP1(ControlSurface):
 
 	@property
 	def selected_scene_num(self):
-		return list(self.song().scenes).index(self.selected_scene)
+		return self._scene_index.index
 
 	@property
 	def selected_clip_slot(self):
@@ -144,17 +207,46 @@ class OP1(ControlSurface):
 	def _with_shift(self, control):
 		return ComboElement(control, modifiers=[self._button_shift])
 
+	def __getattr__(self, name):
+		# Only called for missing attributes: creates named controls on
+		# first use and keeps them as plain attributes from then on
+		named_controls = self.__dict__.get('_named_controls')
+		if named_controls is None or name not in named_controls:
+			raise AttributeError(name)
+		control = named_controls.get(name)
+		setattr(self, name, control)
+		return control
+
+	def _make_button(self, identifier):
+		button = APCUtils.make_pedal_button(identifier)
+		if self.logger.debug_enabled:
+			button.add_value_listener(self.debug_button_handler)
+		return button
+
+	def _make_note(self, identifier):
+		note = APCUtils.make_button(CHANNEL, identifier)
+		if self.logger.debug_enabled:
+			note.add_value_listener(self.debug_note_handler)
+		return note
+
+	def _make_shift_enabled_control(self, encoder_name, shift_value_to_activate):
+		return ShiftEnabledControl(getattr(self, encoder_name), self._button_shift, shift_value_to_activate, self)
+
 	def _build_components(self):
 
-		self._buttons = {}
-		for identifier in range(5, 53) + range(64, 68):
+		# Controls are created the first time they are used, see
+		# `__getattr__`. Modes only touch the controls they map, so most are
+		# never created unless the OP-1 is actually played.
+		self._named_controls = controls.LazyControlRegistry(self)
+		named = self._named_controls
+
+		# Encoders present as buttons when values are changed
+		self._buttons = controls.LazyControlRegistry(self)
+		for identifier in list(range(5, 53)) + list(range(64, 68)):
 			# We create the shift button in a special way
 			if identifier == OP1_SHIFT_BUTTON:
 				continue
-			# Encoders present as buttons when values are changed
-			button = APCUtils.make_pedal_button(identifier)
-			button.add_value_listener(self.debug_button_handler)
-			self._buttons[identifier] = button
+			self._buttons.define(identifier, self._make_button, identifier)
 
 		# Encoder buttons
 		# See notes below for explanation of exclusion of first button
@@ -163,11 +255,14 @@ class OP1(ControlSurface):
 		# 	button.add_value_listener(self.debug_button_handler)
 		# 	APCUtils.make_pedal_button(identifier] = butto)
 
-		self._notes = {}
+		self._notes = controls.LazyControlRegistry(self)
 		for identifier in range(OP1_MIN_NOTE, OP1_MAX_NOTE+1):
-			note = APCUtils.make_button(CHANNEL, identifier)
-			note.add_value_listener(self.debug_note_handler)
-			self._notes[identifier] = note
+			self._notes.define(identifier, self._make_note, identifier)
+
+		if self.logger.debug_enabled or not LAZY_CONTROLS:
+			# Every button and key is logged, including those without a function
+			self._buttons.create_all()
+			self._notes.create_all()
 
 		# Buttons
 		self._button_shift = ButtonElement(
@@ -181,80 +276,98 @@ class OP1(ControlSurface):
 		)
 		# self._button_shift.add_value_listener(self.on_shift_button)
 
-		self._button_mode_synth = self._buttons[OP1_MODE_1_BUTTON]
-		self._button_mode_drum = self._buttons[OP1_MODE_2_BUTTON]
-		self._button_mode_tape = self._buttons[OP1_MODE_3_BUTTON]
-		self._button_mode_mixer = self._buttons[OP1_MODE_4_BUTTON]
-
-		self._button_mode_1 = self._buttons[OP1_T1_BUTTON]
-		self._button_mode_2 = self._buttons[OP1_T2_BUTTON]
-		self._button_mode_3 = self._buttons[OP1_T3_BUTTON]
-		self._button_mode_4 = self._buttons[OP1_T4_BUTTON]
-
-		self._button_down = self._buttons[OP1_ARROW_DOWN_BUTTON]
-		self._button_up = self._buttons[OP1_ARROW_UP_BUTTON]
-		self._button_left = self._buttons[OP1_LEFT_ARROW]
-		self._button_right = self._buttons[OP1_RIGHT_ARROW]
-
-		self._button_metronome = self._buttons[OP1_METRONOME_BUTTON]
-		self._button_scissors = self._buttons[OP1_SCISSOR_BUTTON]
-
-		self._button_ss1 = self._buttons[OP1_SS1_BUTTON]
-		self._button_ss2 = self._buttons[OP1_SS2_BUTTON]
-		self._button_ss3 = self._buttons[OP1_SS3_BUTTON]
-		self._button_ss4 = self._buttons[OP1_SS4_BUTTON]
-		self._button_ss5 = self._buttons[OP1_SS5_BUTTON]
-		self._button_ss6 = self._buttons[OP1_SS6_BUTTON]
-		self._button_ss7 = self._buttons[OP1_SS7_BUTTON]
-		self._button_ss8 = self._buttons[OP1_SS8_BUTTON]
-
-		self._button_record = self._buttons[OP1_REC_BUTTON]
-		self._button_play = self._buttons[OP1_PLAY_BUTTON]
-		self._button_stop  = self._buttons[OP1_STOP_BUTTON]
-
-		self._button_microphone = self._buttons[OP1_MICROPHONE]
-		self._button_com = self._buttons[OP1_COM]
-		self._button_sequencer = self._buttons[OP1_SEQUENCER]
+		named.define('_button_mode_synth', self._buttons.get, OP1_MODE_1_BUTTON)
+		named.define('_button_mode_drum', self._buttons.get, OP1_MODE_2_BUTTON)
+		named.define('_button_mode_tape', self._buttons.get, OP1_MODE_3_BUTTON)
+		named.define('_button_mode_mixer', self._buttons.get, OP1_MODE_4_BUTTON)
+
+		named.define('_button_mode_1', self._buttons.get, OP1_T1_BUTTON)
+		named.define('_button_mode_2', self._buttons.get, OP1_T2_BUTTON)
+		named.define('_button_mode_3', self._buttons.get, OP1_T3_BUTTON)
+		named.define('_button_mode_4', self._buttons.get, OP1_T4_BUTTON)
+
+		named.define('_button_down', self._buttons.get, OP1_ARROW_DOWN_BUTTON)
+		named.define('_button_up', self._buttons.get, OP1_ARROW_UP_BUTTON)
+		named.define('_button_left', self._buttons.get, OP1_LEFT_ARROW)
+		named.define('_button_right', self._buttons.get, OP1_RIGHT_ARROW)
+
+		named.define('_button_metronome', self._buttons.get, OP1_METRONOME_BUTTON)
+		named.define('_button_scissors', self._buttons.get, OP1_SCISSOR_BUTTON)
+
+		named.define('_button_ss1', self._buttons.get, OP1_SS1_BUTTON)
+		named.define('_button_ss2', self._buttons.get, OP1_SS2_BUTTON)
+		named.define('_button_ss3', self._buttons.get, OP1_SS3_BUTTON)
+		named.define('_button_ss4', self._buttons.get, OP1_SS4_BUTTON)
+		named.define('_button_ss5', self._buttons.get, OP1_SS5_BUTTON)
+		named.define('_button_ss6', self._buttons.get, OP1_SS6_BUTTON)
+		named.define('_button_ss7', self._buttons.get, OP1_SS7_BUTTON)
+		named.define('_button_ss8', self._buttons.get, OP1_SS8_BUTTON)
+
+		named.define('_button_record', self._buttons.get, OP1_REC_BUTTON)
+		named.define('_button_play', self._buttons.get, OP1_PLAY_BUTTON)
+		named.define('_button_stop', self._buttons.get, OP1_STOP_BUTTON)
+
+		named.define('_button_microphone', self._buttons.get, OP1_MICROPHONE)
+		named.define('_button_com', self._buttons.get, OP1_COM)
+		named.define('_button_sequencer', self._buttons.get, OP1_SEQUENCER)
+
+		named.define('_button_help', self._buttons.get, OP1_HELP_BUTTON)
+		self._button_help.add_value_listener(self.on_help_button)
+		self._button_com.add_value_listener(self.on_com_button)
 
 		# Encoders
-		self._encoder_1 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_ENCODER_1, ENCODER_MODE)
-		self._encoder_2 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_ENCODER_2, ENCODER_MODE)
-		self._encoder_3 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_ENCODER_3, ENCODER_MODE)
-		self._encoder_4 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_ENCODER_4, ENCODER_MODE)
-
-		self._unshift_encoder_1 = ShiftEnabledControl(self._encoder_1, self._button_shift, False, self)
-		self._unshift_encoder_2 = ShiftEnabledControl(self._encoder_2, self._button_shift, False, self)
-		self._unshift_encoder_3 = ShiftEnabledControl(self._encoder_3, self._button_shift, False, self)
-		self._unshift_encoder_4 = ShiftEnabledControl(self._encoder_4, self._button_shift, False, self)
-		self._shift_encoder_1 = ShiftEnabledControl(self._encoder_1, self._button_shift, True, self)
-		self._shift_encoder_2 = ShiftEnabledControl(self._encoder_2, self._button_shift, True, self)
-		self._shift_encoder_3 = ShiftEnabledControl(self._encoder_3, self._button_shift, True, self)
-		self._shift_encoder_4 = ShiftEnabledControl(self._encoder_4, self._button_shift, True, self)
-
-		self._encoder_u01_1 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_U01_ENCODER_1, ENCODER_MODE)
-		self._encoder_u01_2 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_U01_ENCODER_2, ENCODER_MODE)
-		self._encoder_u01_3 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_U01_ENCODER_3, ENCODER_MODE)
-		self._encoder_u01_4 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_U01_ENCODER_4, ENCODER_MODE)
-
-		self._unshift_encoder_u01_1 = ShiftEnabledControl(self._encoder_u01_1, self._button_shift, False, self)
-		self._unshift_encoder_u01_2 = ShiftEnabledControl(self._encoder_u01_2, self._button_shift, False, self)
-		self._unshift_encoder_u01_3 = ShiftEnabledControl(self._encoder_u01_3, self._button_shift, False, self)
-		self._unshift_encoder_u01_4 = ShiftEnabledControl(self._encoder_u01_4, self._button_shift, False, self)
-		self._shift_encoder_u01_1 = ShiftEnabledControl(self._encoder_u01_1, self._button_shift, True, self)
-		self._shift_encoder_u01_2 = ShiftEnabledControl(self._encoder_u01_2, self._button_shift, True, self)
-		self._shift_encoder_u01_3 = ShiftEnabledControl(self._encoder_u01_3, self._button_shift, True, self)
-		self._shift_encoder_u01_4 = ShiftEnabledControl(self._encoder_u01_4, self._button_shift, True, self)
-
-		self._encoder_u02_1 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_U02_ENCODER_1, ENCODER_MODE)
-		self._encoder_u02_2 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_U02_ENCODER_2, ENCODER_MODE)
-		self._encoder_u02_3 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_U02_ENCODER_3, ENCODER_MODE)
-		self._encoder_u02_4 = EncoderElement(MIDI_CC_TYPE, CHANNEL, OP1_U02_ENCODER_4, ENCODER_MODE)
-
+		named.define('_encoder_1', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_ENCODER_1, ENCODER_MODE)
+		named.define('_encoder_2', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_ENCODER_2, ENCODER_MODE)
+		named.define('_encoder_3', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_ENCODER_3, ENCODER_MODE)
+		named.define('_encoder_4', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_ENCODER_4, ENCODER_MODE)
+
+		named.define('_unshift_encoder_1', self._make_shift_enabled_control, '_encoder_1', False)
+		named.define('_unshift_encoder_2', self._make_shift_enabled_control, '_encoder_2', False)
+		named.define('_unshift_encoder_3', self._make_shift_enabled_control, '_encoder_3', False)
+		named.define('_unshift_encoder_4', self._make_shift_enabled_control, '_encoder_4', False)
+		named.define('_shift_encoder_1', self._make_shift_enabled_control, '_encoder_1', True)
+		named.define('_shift_encoder_2', self._make_shift_enabled_control, '_encoder_2', True)
+		named.define('_shift_encoder_3', self._make_shift_enabled_control, '_encoder_3', True)
+		named.define('_shift_encoder_4', self._make_shift_enabled_control, '_encoder_4', True)
+
+		named.define('_encoder_u01_1', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_U01_ENCODER_1, ENCODER_MODE)
+		named.define('_encoder_u01_2', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_U01_ENCODER_2, ENCODER_MODE)
+		named.define('_encoder_u01_3', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_U01_ENCODER_3, ENCODER_MODE)
+		named.define('_encoder_u01_4', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_U01_ENCODER_4, ENCODER_MODE)
+
+		named.define('_unshift_encoder_u01_1', self._make_shift_enabled_control, '_encoder_u01_1', False)
+		named.define('_unshift_encoder_u01_2', self._make_shift_enabled_control, '_encoder_u01_2', False)
+		named.define('_unshift_encoder_u01_3', self._make_shift_enabled_control, '_encoder_u01_3', False)
+		named.define('_unshift_encoder_u01_4', self._make_shift_enabled_control, '_encoder_u01_4', False)
+		named.define('_shift_encoder_u01_1', self._make_shift_enabled_control, '_encoder_u01_1', True)
+		named.define('_shift_encoder_u01_2', self._make_shift_enabled_control, '_encoder_u01_2', True)
+		named.define('_shift_encoder_u01_3', self._make_shift_enabled_control, '_encoder_u01_3', True)
+		named.define('_shift_encoder_u01_4', self._make_shift_enabled_control, '_encoder_u01_4', True)
+
+		named.define('_encoder_u02_1', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_U02_ENCODER_1, ENCODER_MODE)
+		named.define('_encoder_u02_2', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_U02_ENCODER_2, ENCODER_MODE)
+		named.define('_encoder_u02_3', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_U02_ENCODER_3, ENCODER_MODE)
+		named.define('_encoder_u02_4', EncoderElement, MIDI_CC_TYPE, CHANNEL, OP1_U02_ENCODER_4, ENCODER_MODE)
+
+		named.define('_unshift_encoder_u02_1', self._make_shift_enabled_control, '_encoder_u02_1', False)
+		named.define('_unshift_encoder_u02_2', self._make_shift_enabled_control, '_encoder_u02_2', False)
+		named.define('_unshift_encoder_u02_3', self._make_shift_enabled_control, '_encoder_u02_3', False)
+		named.define('_unshift_encoder_u02_4', self._make_shift_enabled_control, '_encoder_u02_4', False)
+		named.define('_shift_encoder_u02_1', self._make_shift_enabled_control, '_encoder_u02_1', True)
+		named.define('_shift_encoder_u02_2', self._make_shift_enabled_control, '_encoder_u02_2', True)
+		named.define('_shift_encoder_u02_3', self._make_shift_enabled_control, '_encoder_u02_3', True)
+		named.define('_shift_encoder_u02_4', self._make_shift_enabled_control, '_encoder_u02_4', True)
+
+		# U03 encoders are left out, OP1_U03_ENCODER_4 shares its CC with
+		# OP1_ENCODER_1_BUTTON
 		# NOTE: encoder_1_button conflicts with encoder_U03_4
-		self._encoder_button_1 = self._buttons[OP1_ENCODER_1_BUTTON]
-		self._encoder_button_2 = self._buttons[OP1_ENCODER_2_BUTTON]
-		self._encoder_button_3 = self._buttons[OP1_ENCODER_3_BUTTON]
-		self._encoder_button_4 = self._buttons[OP1_ENCODER_4_BUTTON]
+		named.define('_encoder_button_1', self._buttons.get, OP1_ENCODER_1_BUTTON)
+		named.define('_encoder_button_2', self._buttons.get, OP1_ENCODER_2_BUTTON)
+		named.define('_encoder_button_3', self._buttons.get, OP1_ENCODER_3_BUTTON)
+		named.define('_encoder_button_4', self._buttons.get, OP1_ENCODER_4_BUTTON)
+
+		if not LAZY_CONTROLS:
+			named.create_all()
 
 		self._mixer = MixerComponent(
 			num_tracks=NUM_TRACKS,
@@ -276,8 +389,10 @@ class OP1(ControlSurface):
 
 		self.scene_offset = 0
 		self.song().view.add_selected_scene_listener(self.selected_scene_changed)
-		self._button_right.add_value_listener(on_down_button)
-		self._button_left.add_value_listener(on_up_button)
+		self._button_right.add_value_listener(
+			self.instrumentation.wrap('on_down_button', on_down_button))
+		self._button_left.add_value_listener(
+			self.instrumentation.wrap('on_up_button', on_up_button))
 
 		self._transport = TransportComponent()
 		self._transport.set_metronome_button(self._button_metronome)
@@ -364,7 +479,7 @@ class OP1(ControlSurface):
 		self.set_mode(self.tracks_mode)
 
 	def set_mode(self, mode):
-		self.log_message('set_mode()')
+		self.logger.debug('set_mode()')
 		if self.current_mode is not None:
 			self.current_mode.deactivate()
 		self.current_mode = mode
@@ -380,24 +495,61 @@ class OP1(ControlSurface):
 
 	def on_shift_button(self, value):
 		if value == BUTTON_ON:
-			self.log_message('shift on')
+			self.logger.debug('shift on')
 			pass
 		else:
-			self.log_message('shift off')
+			self.logger.debug('shift off')
 			pass
 
+	def on_help_button(self, value):
+		# Shift + help writes out handler latencies and everything buffered
+		# by the logger
+		if value == BUTTON_ON and self._button_shift.is_pressed():
+			for line in self.instrumentation.summary():
+				self.log_message(line)
+			self.log_message('Listeners: %s' % ', '.join(
+				'%s %s' % (type(mode).__name__, mode.num_listeners)
+				for mode in (self.tracks_mode, self.effects_mode)
+			))
+			self.log_message('Connection: %s, rtt: %s' % (self.connection.state, self.connection.format_rtt()))
+			self.logger.flush()
+
+	def on_com_button(self, value):
+		if value == BUTTON_ON and self._button_shift.is_pressed():
+			self.toggle_profiler()
+
+	def toggle_profiler(self):
+		if not self.profiler.available:
+			self.logger.warning('Profiling unavailable, cProfile could not be imported')
+			return
+
+		if not self.profiler.running:
+			self.profiler.start('%s-%sx%s' % (
+				type(self.current_mode).__name__,
+				len(self.song().tracks),
+				len(self.song().scenes),
+			))
+			self.show_message('Profiling started')
+			self.logger.info('Profiling started')
+		else:
+			path = self.profiler.stop()
+			self.show_message('Profile written to %s' % os.path.basename(path))
+			self.logger.info('Profile written to %s', path)
+
 	#
 	# Scene selection
 	#
 
 	def selected_scene_changed(self):
-		self.log_message('selected_scene_changed()')
+		self.logger.debug('selected_scene_changed()')
+		self.frame_governor.note_activity()
 		self.scene_offset = self.selected_scene_num
 		self.map_clip_controls_for_current_scene()
 
 	def set_selected_scene(self, scene_offset):
 		scene_offset = max(0, scene_offset)
-		scene_offset = min(scene_offset, self.num_scenes-1)
+		# Any scene can be selected, the display pages along with it
+		scene_offset = min(scene_offset, len(self.song().scenes)-1)
 
 		next_scene = self.song().scenes[scene_offset]
 		next_scene = self.song().view.selected_scene = next_scene
@@ -418,8 +570,14 @@ class OP1(ControlSurface):
 	def clip_fired(self, clip_num, value):
 		if value == NOTE_ON:
 
-			self.log_message('clip_fired(clip_num=%s, value=%s)' % (clip_num, value))
-			clip_slot = self.selected_track.clip_slots[clip_num]
+			self.logger.debug('clip_fired(clip_num=%s, value=%s)', clip_num, value)
+
+			# Keys fire clips in the displayed page of clip slots
+			scene_num = self.selected_track_model.window_start + clip_num
+			clip_slots = self.selected_track.clip_slots
+			if scene_num >= len(clip_slots):
+				return
+			clip_slot = clip_slots[scene_num]
 
 			# if clip_slot.is_playing:
 			# 	self.log_message('stoping clip')
@@ -432,21 +590,22 @@ class OP1(ControlSurface):
 			# 	))
 			# 	clip_slot.fire()
 
-			self.log_message('firing clip. has_clip=%s has_stop=%s, playing_status=%s' % (
-				clip_slot.has_clip,
-				clip_slot.has_stop_button,
-				clip_slot.playing_status,
-			))
+			if self.logger.debug_enabled:
+				self.logger.debug('firing clip. has_clip=%s has_stop=%s, playing_status=%s',
+					clip_slot.has_clip,
+					clip_slot.has_stop_button,
+					clip_slot.playing_status,
+				)
 			clip_slot.fire()
 
 
 
 			# Update scene selection to fired clip's row.
-			self.set_selected_scene(clip_num)
+			self.set_selected_scene(scene_num)
 
 	def selected_clip_deleted(self, value):
 		if value == BUTTON_ON:
-			self.log_message('deleting clip')
+			self.logger.debug('deleting clip')
 			self.selected_clip_slot.delete_clip()
 
 	#
@@ -462,31 +621,53 @@ class OP1(ControlSurface):
 	#
 
 	def handle_sysex(self, midi_bytes):
+		if self._midi_journal is not None:
+			self._midi_journal.record_sysex(midi_bytes)
 		super(OP1, self).handle_sysex(midi_bytes)
-		if (len(midi_bytes) >= 8 and (midi_bytes[6]==32) and (midi_bytes[7]==118)):
-			self.handle_device_connection_success()
+		identity = connection.parse_identity_reply(midi_bytes)
+		if identity is not None:
+			self.connection.handle_identity_reply(identity)
 		else:
-			self.log_message("sysex: %s" % (midi_bytes, ))
+			self.logger.debug("sysex: %s", midi_bytes)
 
 	def refresh_state(self):
 		super(OP1, self).refresh_state()
 
-		self.log_message("refresh_state()")
-		self.retries_count = 0
-		self.next_retry_ts = None
-		self.next_retry_delay = 1
-		self.device_connected = False
+		self.logger.debug("refresh_state()")
+		# Probing restarts on the next display update
+		self.connection.reset()
+		self.display_frames.invalidate()
+		self.midi_output.clear()
 
 	def update_display(self):
+		tick_start = monotonic()
+		render_seconds = None
 		super(OP1, self).update_display()
+		self.scheduler.run_due()
 
 		if not(self.device_connected):
-			if self.next_retry_ts is None or time.time() >= self.next_retry_ts:
-				self.attempt_connection_with_device()
-			return
+			# Retries are scheduled by the connection once started
+			self.connection.start()
+		else:
+			# Apply input accumulated since the last update on every update,
+			# parameter writes don't wait for display frames
+			self.current_mode.update()
 
-		# Render the currently active view
-		self.current_mode.view.render()
+			# Render the currently active view when a frame is due, only
+			# rendering counts towards the governor's time share
+			if self.frame_governor.frame_due():
+				render_start = monotonic()
+				self.current_mode.view.render()
+				render_seconds = monotonic() - render_start
+
+		# Send what this tick queued, within the output budget
+		self.midi_output.flush()
+
+		if render_seconds is not None:
+			self.frame_governor.frame_rendered(render_seconds, self.midi_output.pending_bytes)
+
+		# Write buffered log records with what is left of this tick's budget
+		self.logger.flush(log.LOG_FLUSH_BATCH_SIZE, tick_start + LOG_FLUSH_BUDGET)
 
 	#
 	# Connection Management
@@ -498,26 +679,51 @@ class OP1(ControlSurface):
 		# map mixer controls to currently selected track
 		# self.map_mixer_controls_for_current_track()
 
-	def attempt_connection_with_device(self):
-		self.log_message("Attempting to connect to OP-1... (num_retries: %s)" % self.retries_count)
-		self.retries_count += 1
-		self.next_retry_ts = time.time() + self.next_retry_delay
-		self.next_retry_delay *= 2
-		self._send_midi(ID_SEQUENCE)
+	def send_identity_request(self):
+		self.midi_output.send(ID_SEQUENCE, output.OUTPUT_PRIORITY_HANDSHAKE)
 
 	def handle_device_connection_success(self):
-		self.device_connected = True
-		self.retries_count = 0
-		self.log_message("OP-1 Connected")
-		self._send_midi(ENABLE_SEQUENCE)
+		self.midi_output.send(ENABLE_SEQUENCE, output.OUTPUT_PRIORITY_HANDSHAKE)
+
+		# Device display state is unknown after (re)connecting, frames
+		# still queued for it are superseded by the full resync
+		self.display_frames.invalidate()
+		self.midi_output.clear(output.OUTPUT_PRIORITY_DISPLAY)
+		self.frame_governor.note_activity()
+
+	def handle_device_connection_lost(self):
+		# Nothing queued will reach the display, it is resynced on reconnect
+		self.midi_output.clear()
 
 	def disconnect(self):
-		self.log_message("disconnect()")
-		self.retries_count = 0
-		self.device_connected = False
-		self._send_midi(DISABLE_SEQUENCE)
+		self.logger.debug("disconnect()")
+		self.connection.reset()
+		self.midi_output.clear()
+		self.midi_output.send(DISABLE_SEQUENCE, output.OUTPUT_PRIORITY_HANDSHAKE)
+		self.stop_midi_journal()
+		if self.profiler.running:
+			self.toggle_profiler()
+		self.tracks_mode.disconnect()
+		self.effects_mode.disconnect()
+		self.scheduler.cancel_all()
+		self.selected_track_model.disconnect()
+		self._track_index.disconnect()
+		self._scene_index.disconnect()
 		super(OP1, self).disconnect()
 
+	#
+	# MIDI Output
+	#
+
+	def _send_midi(self, midi_event_bytes, optimized=None):
+		# Control feedback from the framework, queued ahead of display frames
+		self.midi_output.send(midi_event_bytes, output.OUTPUT_PRIORITY_FEEDBACK)
+		return True
+
+	def _send_display_frame(self, frame, channel):
+		# A frame still queued for the same channel is replaced
+		self.midi_output.send(frame, output.OUTPUT_PRIORITY_DISPLAY, key=channel)
+
 	def suggest_input_port(self):
 		return "OP-1 Midi Device"
 
@@ -529,18 +735,40 @@ class OP1(ControlSurface):
 	#
 
 	def param_value_updated(self, param):
-		self.log_message('Param update: %s(%s)' % (param.name, param.value))
-		self.log_message('    value_items: %s' % (list(param.value_items), ))
+		if self.logger.debug_enabled:
+			self.logger.debug('Param update: %s(%s)', param.name, param.value)
+			self.logger.debug('    value_items: %s', list(param.value_items))
 
 	def debug_button_handler(self, value, *args, **kwargs):
-		self.log_message('button: %s' % value)
+		self.logger.debug('button: %s', value)
 
 	def debug_note_handler(self, value, *args, **kwargs):
-		self.log_message('note: %s' % value)
+		self.logger.debug('note: %s', value)
+
+	def start_midi_journal(self, path):
+		"""
+		Records every incoming MIDI message to a journal at `path`, which
+		`journal.replay` can later feed back into a surface.
+		"""
+		self.stop_midi_journal()
+		self._midi_journal = journal.JournalWriter(path)
+		self.logger.info('Recording MIDI journal to %s', path)
+
+	def stop_midi_journal(self):
+		if self._midi_journal is None:
+			return
+		self.logger.info('MIDI journal stopped after %s messages', self._midi_journal.num_messages)
+		self._midi_journal.close()
+		self._midi_journal = None
 
 	def handle_nonsysex(self, midi_bytes):
+		if self._midi_journal is not None:
+			self._midi_journal.record_nonsysex(midi_bytes)
+		self.frame_governor.note_activity()
 		super(OP1, self).handle_nonsysex(midi_bytes)
+		if not self.logger.debug_enabled:
+			return
 		channel, identifier, value, is_pitchbend = midi_bytes_to_values(midi_bytes)
 		if not is_pitchbend:
-			self.log_message('midi ch:%s value:%s(%s)' % (channel, identifier, value))
+			self.logger.debug('midi ch:%s value:%s(%s)', channel, identifier, value)
 
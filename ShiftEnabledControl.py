@@ -17,15 +17,17 @@ class ShiftEnabledControl(object):
         self._listener = None
         self._param = None
 
+        surface.instrumentation.wrap_methods(self, '_on_shift')
         self._shift_button.add_value_listener(self._on_shift)
 
-    def log_message(self, msg):
-        self._surface.log_message(msg)
+    @property
+    def logger(self):
+        return self._surface.logger
 
     def _on_shift(self, value):
         control_is_activated = (bool(value) == self._shift_value_to_activate)
 
-        self.log_message('shift: %s, value_needed: %s, control_activated: %s' % (bool(value), self._shift_value_to_activate, control_is_activated))
+        self.logger.debug('shift: %s, value_needed: %s, control_activated: %s', bool(value), self._shift_value_to_activate, control_is_activated)
         if control_is_activated:
             self._activate()
         else:
@@ -33,22 +35,27 @@ class ShiftEnabledControl(object):
 
     def _activate(self):
         # self.log_message('ShiftEnabledControl._activate')
-        if self._listener:
+        if self._listener and not self._wrapped_control.value_has_listener(self._listener):
             self._wrapped_control.add_value_listener(self._listener)
         if self._param:
-            self.log_message('Connecting to : %s' % self._param.name)
+            if self.logger.debug_enabled:
+                self.logger.debug('Connecting to : %s', self._param.name)
             self._wrapped_control.connect_to(self._param)
 
     def _deactivate(self):
         # self.log_message('ShiftEnabledControl._deactivate')
-        if self._listener:
-            self._wrapped_control.remove_value_listener(self._listener)
+        self._detach_listener()
 
         # Only release control if currently mapped to ours
         if self._param == self._wrapped_control.mapped_parameter:
-            self.log_message('Disconnecting: %s' % self._param.name)
+            if self.logger.debug_enabled:
+                self.logger.debug('Disconnecting: %s', self._param.name)
             self._wrapped_control.release_parameter()
 
+    def _detach_listener(self):
+        if self._listener and self._wrapped_control.value_has_listener(self._listener):
+            self._wrapped_control.remove_value_listener(self._listener)
+
     def _reset(self):
         self._deactivate()
         self._activate()
@@ -65,12 +72,18 @@ class ShiftEnabledControl(object):
             self._reset()
 
     def add_value_listener(self, callback):
-        self.log_message('ShiftEnabledControl.add_value_listener: %s' % callback)
+        self.logger.debug('ShiftEnabledControl.add_value_listener: %s', callback)
+        self._detach_listener()
         self._listener = callback
         if not self._shift_value_to_activate:
             self._reset()
 
+    def value_has_listener(self, callback):
+        return self._listener is not None and self._listener == callback
+
     def remove_value_listener(self, callback):
+        # Detached first, `_reset` can't find the listener once forgotten
+        self._detach_listener()
         self._listener = None
         if not self._shift_value_to_activate:
             self._reset()
@@ -19,11 +19,11 @@
 
 import Live
     
-from OP1 import OP1
+from .OP1 import OP1
 
 def debug_print(message):
     ' Special function for debug output '
-    print message
+    print(message)
     
 def create_instance(c_instance):
     return OP1(c_instance)
@@ -0,0 +1,298 @@
+"""
+Render-tick benchmark suite for the display path, run against fake live
+sets of increasing size through `harness`.
+
+For every set size, clip density and device parameter count it times:
+
+- `OP1.update_display()`
+- `CurrentTrackInfoView.update()`
+- `CurrentTrackEffectsView.update()`
+- `OP1View.render()` of the tracks view
+
+both idle and while navigating (selection changes between ticks), and
+reports per-tick latency percentiles, peak bytes allocated per tick and
+display sysex bytes sent per second at Live's display tick rate.
+
+    python benchmarks/render.py
+    python benchmarks/render.py --repeat 5 --write-baseline benchmarks/baseline.json
+    python benchmarks/render.py --repeat 5 --compare benchmarks/baseline.json
+
+`--compare` exits with status 1 when a case regressed. Allocation figures
+need Python 3 (`tracemalloc`).
+
+The reference baseline is committed as `benchmarks/baseline.json`. Each
+run also times a fixed pure Python workload, and `--compare` scales the
+baseline's timings by how much faster or slower that ran, so a baseline
+recorded on another machine still compares. A case regresses when its
+median exceeds the scaled baseline by the relative tolerance plus an
+absolute slack, so jitter alone can't fail cases taking microseconds.
+The machine and Python it was recorded with are reported when they
+differ.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import harness
+
+# Live calls `update_display` every 100ms
+LIVE_TICKS_PER_SECOND = 10
+
+SET_SIZES = (10, 100, 1000)
+CLIP_DENSITIES = (0.1, 0.9)
+DEVICE_PARAMETER_COUNTS = (16, 128)
+SCENARIOS = ('idle', 'navigate')
+TARGETS = ('update_display', 'track_info_update', 'effects_update', 'render')
+
+# Slowdown of the median tick tolerated by `--compare`, relative and in
+# microseconds on top
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_SLACK_US = 10.0
+
+# Workload timing the interpreter's speed, see `calibrate`
+CALIBRATION_STMT = 'sorted(data, key=str)'
+CALIBRATION_SETUP = 'data = list(range(500, 0, -1))'
+
+
+class Case(object):
+    def __init__(self, target, scenario, set_size, clip_density, num_device_parameters):
+        self.target = target
+        self.scenario = scenario
+        self.set_size = set_size
+        self.clip_density = clip_density
+        self.num_device_parameters = num_device_parameters
+
+    @property
+    def key(self):
+        return '%s/%s/%sx%s/clips=%s/params=%s' % (
+            self.target,
+            self.scenario,
+            self.set_size,
+            self.set_size,
+            self.clip_density,
+            self.num_device_parameters,
+        )
+
+    def setup(self):
+        """
+        Returns:
+            Tuple[OP1, Callable, Callable]: surface, tick to time and an
+                untimed step run between ticks
+        """
+        # Time the surface by Live's ticks rather than by how fast the
+        # benchmark runs them
+        clock = harness.load_surface_module('scheduler').VirtualClock()
+        surface = harness.create_surface(
+            clock=clock,
+            num_tracks=self.set_size,
+            num_scenes=self.set_size,
+            clip_density=self.clip_density,
+            num_device_parameters=self.num_device_parameters,
+        )
+        harness.connect(surface)
+
+        if self.target == 'effects_update':
+            surface.set_mode(surface.effects_mode)
+
+        tick = {
+            'update_display': surface.update_display,
+            'track_info_update': surface.tracks_mode.view.update,
+            'effects_update': surface.effects_mode.view.update,
+            'render': surface.tracks_mode.view.render,
+        }[self.target]
+
+        song = surface.song()
+        position = [0]
+
+        def advance():
+            clock.advance(1.0 / LIVE_TICKS_PER_SECOND)
+            if self.target != 'update_display':
+                # Only `update_display` runs timed tasks and flushes what
+                # views queued
+                surface.scheduler.run_due()
+                surface.midi_output.flush()
+
+        def navigate():
+            advance()
+            position[0] += 1
+            song.view.selected_scene = song.scenes[position[0] % len(song.scenes)]
+            if self.target != 'effects_update' and position[0] % 10 == 0:
+                song.view.selected_track = song.tracks[(position[0] // 10) % len(song.tracks)]
+
+        step = navigate if self.scenario == 'navigate' else advance
+
+        # Settle connection and first full frames outside of measurement,
+        # idle cases start past the full frame rate after connecting
+        tick()
+        surface.update_display()
+        clock.advance(harness.load_surface_module('consts').DISPLAY_ACTIVITY_HOLD)
+        surface.c_instance.clear_sent()
+        return surface, tick, step
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def calibrate():
+    """
+    Returns:
+        float: microseconds a fixed workload takes, fastest of many runs
+    """
+    timer = timeit.Timer(CALIBRATION_STMT, setup=CALIBRATION_SETUP)
+    return 1e6 * min(timer.repeat(50, 10)) / 10
+
+
+def run_case(case, num_ticks):
+    surface, tick, step = case.setup()
+    timer = timeit.default_timer
+
+    durations = []
+    for _ in range(num_ticks):
+        step()
+        start = timer()
+        tick()
+        durations.append(timer() - start)
+    durations.sort()
+
+    sent_bytes = surface.c_instance.sent_bytes
+    result = {
+        'p50_us': 1e6 * percentile(durations, 0.5),
+        'p90_us': 1e6 * percentile(durations, 0.9),
+        'p99_us': 1e6 * percentile(durations, 0.99),
+        'max_us': 1e6 * durations[-1],
+        'sysex_bytes_per_s': sent_bytes * LIVE_TICKS_PER_SECOND / float(num_ticks),
+        'alloc_bytes_per_tick': None,
+    }
+
+    if tracemalloc is not None:
+        # Separate pass, tracing slows down every allocation
+        peaks = []
+        for _ in range(min(num_ticks, 50)):
+            step()
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            tick()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            tracemalloc.stop()
+        result['alloc_bytes_per_tick'] = sum(peaks) / float(len(peaks))
+
+    surface.disconnect()
+    return result
+
+
+def iter_cases():
+    for set_size in SET_SIZES:
+        for clip_density in CLIP_DENSITIES:
+            for num_device_parameters in DEVICE_PARAMETER_COUNTS:
+                for target in TARGETS:
+                    for scenario in SCENARIOS:
+                        yield Case(target, scenario, set_size, clip_density, num_device_parameters)
+
+
+def compare(results, baseline, tolerance, slack_us, speed=1.0):
+    """
+    Args:
+        speed (float): how much longer the calibration workload took in
+            this run than when `baseline` was recorded
+    Returns:
+        List[str]: descriptions of regressions against `baseline`
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        expected_p50 = expected['p50_us'] * speed
+        if result['p50_us'] > expected_p50 * (1 + tolerance) + slack_us:
+            regressions.append('%s: p50 %.1fus, baseline %.1fus scaled to this run' % (
+                key, result['p50_us'], expected_p50))
+        if result['sysex_bytes_per_s'] > expected['sysex_bytes_per_s']:
+            regressions.append('%s: %.0f sysex bytes/s, baseline %.0f' % (
+                key, result['sysex_bytes_per_s'], expected['sysex_bytes_per_s']))
+        alloc, expected_alloc = result['alloc_bytes_per_tick'], expected.get('alloc_bytes_per_tick')
+        if alloc is not None and expected_alloc is not None and alloc > expected_alloc * (1 + tolerance) + 64:
+            regressions.append('%s: %.0f bytes allocated/tick, baseline %.0f' % (key, alloc, expected_alloc))
+    return regressions
+
+
+def format_alloc(value):
+    return 'n/a' if value is None else '%.0f' % value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ticks', type=int, default=200, help='ticks timed per case')
+    parser.add_argument('--filter', default='', help='only run cases whose key contains this')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='runs per case, the one with the fastest median is kept')
+    parser.add_argument('--write-baseline', metavar='PATH', help='write results as JSON')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--slack-us', type=float, default=DEFAULT_SLACK_US)
+    args = parser.parse_args(argv)
+
+    # Once per run, before and after the cases in case the load changed
+    calibration_us = calibrate()
+    results = {}
+    print('%-62s %9s %9s %9s %9s %12s %12s' % (
+        'case', 'p50 us', 'p90 us', 'p99 us', 'max us', 'alloc B/t', 'sysex B/s'))
+    for case in iter_cases():
+        if args.filter not in case.key:
+            continue
+        result = results[case.key] = min(
+            (run_case(case, args.ticks) for _ in range(args.repeat)),
+            key=lambda result: result['p50_us'],
+        )
+        print('%-62s %9.1f %9.1f %9.1f %9.1f %12s %12.0f' % (
+            case.key,
+            result['p50_us'],
+            result['p90_us'],
+            result['p99_us'],
+            result['max_us'],
+            format_alloc(result['alloc_bytes_per_tick']),
+            result['sysex_bytes_per_s'],
+        ))
+    calibration_us = min(calibration_us, calibrate())
+    print('calibration %.1fus' % calibration_us)
+
+    if args.write_baseline:
+        with open(args.write_baseline, 'w') as f:
+            json.dump({
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'calibration_us': calibration_us,
+                'ticks': args.ticks,
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline_file = json.load(f)
+        for field, current in (('python', sys.version.split()[0]), ('platform', platform.platform())):
+            if baseline_file.get(field) != current:
+                print('NOTE baseline recorded with %s %s, running %s' % (field, baseline_file.get(field), current))
+        # Baselines without calibration compare unscaled
+        speed = calibration_us / baseline_file.get('calibration_us', calibration_us)
+        print('calibration %.2fx of baseline' % speed)
+        regressions = compare(results, baseline_file['results'], args.tolerance, args.slack_us, speed)
+        for regression in regressions:
+            print('REGRESSION %s' % regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
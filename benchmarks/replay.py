@@ -0,0 +1,131 @@
+"""
+Replays a MIDI journal (see `journal.py`) into a headless surface and
+reports callback throughput in messages per second.
+
+    python benchmarks/replay.py                      # synthetic bursts
+    python benchmarks/replay.py show.op1j --realtime
+    python benchmarks/replay.py --synthesize bursts.op1j
+
+Journals are recorded in Live by setting `MIDI_JOURNAL_PATH` in
+`consts.py`. Without a journal, one with encoder and keyboard bursts is
+synthesized and replayed as fast as possible.
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import harness
+
+# Seconds between two messages of a burst
+ENCODER_BURST_SPACING = 0.004
+KEYBOARD_BURST_SPACING = 0.03
+
+
+def synthesize(path, num_bursts=20):
+    """
+    Writes a journal alternating encoder turns, clip key presses, scene
+    navigation and mode switches.
+    """
+    journal = harness.load_surface_module('journal')
+    consts = harness.load_surface_module('consts')
+    clock = harness.load_surface_module('scheduler').VirtualClock()
+    writer = journal.JournalWriter(path, clock=clock)
+
+    def cc(identifier, value, spacing):
+        writer.record_nonsysex((0xb0 | consts.CHANNEL, identifier, value))
+        clock.advance(spacing)
+
+    def note(identifier, spacing):
+        writer.record_nonsysex((0x90 | consts.CHANNEL, identifier, consts.NOTE_ON))
+        clock.advance(spacing)
+        writer.record_nonsysex((0x80 | consts.CHANNEL, identifier, 0))
+        clock.advance(spacing)
+
+    writer.record_sysex(harness.OP1_IDENTITY_REPLY)
+    encoders = (consts.OP1_ENCODER_1, consts.OP1_ENCODER_2, consts.OP1_ENCODER_3, consts.OP1_ENCODER_4)
+    keys = (consts.OP1_F3_NOTE, consts.OP1_G3_NOTE, consts.OP1_A3_NOTE, consts.OP1_B3_NOTE)
+
+    for burst in range(num_bursts):
+        mode_button = consts.OP1_MODE_2_BUTTON if burst % 2 else consts.OP1_MODE_1_BUTTON
+        cc(mode_button, consts.BUTTON_ON, 0.05)
+        cc(mode_button, consts.BUTTON_OFF, 0.05)
+
+        # Fast turns clockwise, then back
+        for encoder in encoders:
+            for value in (1,) * 40 + (127,) * 40:
+                cc(encoder, value, ENCODER_BURST_SPACING)
+
+        for key in keys:
+            note(key, KEYBOARD_BURST_SPACING)
+
+        for arrow in (consts.OP1_RIGHT_ARROW, consts.OP1_LEFT_ARROW):
+            cc(arrow, consts.BUTTON_ON, KEYBOARD_BURST_SPACING)
+            cc(arrow, consts.BUTTON_OFF, KEYBOARD_BURST_SPACING)
+
+    writer.close()
+    return writer.num_messages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('journal', nargs='?', help='journal to replay, synthesized if omitted')
+    parser.add_argument('--synthesize', metavar='PATH', help='only write a synthetic journal')
+    parser.add_argument('--realtime', action='store_true', help='keep the recorded timing')
+    parser.add_argument('--display-interval', type=float, default=0.1,
+                        help='recorded seconds between display updates, 0 disables them')
+    parser.add_argument('--tracks', type=int, default=100)
+    parser.add_argument('--scenes', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    if args.synthesize:
+        print('%s messages written to %s' % (synthesize(args.synthesize), args.synthesize))
+        return 0
+
+    temp_dir = None
+    path = args.journal
+    if path is None:
+        temp_dir = tempfile.mkdtemp()
+        path = os.path.join(temp_dir, 'bursts.op1j')
+        synthesize(path)
+
+    try:
+        journal = harness.load_surface_module('journal')
+        surface = harness.create_surface(
+            num_tracks=args.tracks,
+            num_scenes=args.scenes,
+        )
+        surface.c_instance.capture_messages = False
+        harness.connect(surface)
+
+        reader = journal.JournalReader(path)
+        try:
+            stats = journal.replay(
+                surface,
+                reader,
+                realtime=args.realtime,
+                display_interval=args.display_interval or None,
+            )
+        finally:
+            reader.close()
+        surface.disconnect()
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir)
+
+    print('%d messages, %d display updates in %.3fs: %.0f messages/s, %d bytes sent' % (
+        stats['messages'],
+        stats['display_updates'],
+        stats['seconds'],
+        stats['messages_per_second'],
+        surface.c_instance.sent_bytes,
+    ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
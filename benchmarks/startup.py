@@ -0,0 +1,108 @@
+"""
+Surface startup benchmark, comparing control elements created on first use
+(`LAZY_CONTROLS = True`) against creating all of them in `__init__`.
+
+For both it times `create_instance`, as Live runs it at startup and on
+every preference change, and the time until the first frame once an
+OP-1 answers. It also reports the control elements registered with the
+surface and peak bytes allocated while constructing it.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 50 --tracks 100
+
+Allocation figures need Python 3 (`tracemalloc`).
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import harness
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_case(lazy, num_runs, num_tracks, num_scenes):
+    harness.load_surface_package()
+    surface_module = sys.modules['%s.OP1' % harness.PACKAGE_NAME]
+    timer = timeit.default_timer
+
+    create_durations = []
+    first_frame_durations = []
+    num_controls = 0
+    previous = surface_module.LAZY_CONTROLS
+    surface_module.LAZY_CONTROLS = lazy
+    try:
+        for _ in range(num_runs):
+            song = harness.build_song(num_tracks=num_tracks, num_scenes=num_scenes)
+
+            start = timer()
+            surface = harness.create_surface(song)
+            created = timer()
+            harness.connect(surface)
+            surface.update_display()
+            first_frame = timer()
+
+            create_durations.append(created - start)
+            first_frame_durations.append(first_frame - start)
+            num_controls = len(surface.controls)
+            surface.disconnect()
+
+        alloc_peak = None
+        if tracemalloc is not None:
+            # Separate pass, tracing slows down every allocation
+            song = harness.build_song(num_tracks=num_tracks, num_scenes=num_scenes)
+            tracemalloc.start()
+            surface = harness.create_surface(song)
+            alloc_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            surface.disconnect()
+    finally:
+        surface_module.LAZY_CONTROLS = previous
+
+    create_durations.sort()
+    first_frame_durations.sort()
+    return {
+        'create_p50_ms': 1e3 * percentile(create_durations, 0.5),
+        'create_p90_ms': 1e3 * percentile(create_durations, 0.9),
+        'first_frame_p50_ms': 1e3 * percentile(first_frame_durations, 0.5),
+        'controls': num_controls,
+        'alloc_peak_bytes': alloc_peak,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20, help='surfaces created per case')
+    parser.add_argument('--tracks', type=int, default=10)
+    parser.add_argument('--scenes', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print('%-8s %14s %14s %17s %9s %12s' % (
+        'case', 'create p50 ms', 'create p90 ms', 'first frame ms', 'elements', 'alloc peak B'))
+    for name, lazy in (('eager', False), ('lazy', True)):
+        result = run_case(lazy, args.runs, args.tracks, args.scenes)
+        print('%-8s %14.2f %14.2f %17.2f %9d %12s' % (
+            name,
+            result['create_p50_ms'],
+            result['create_p90_ms'],
+            result['first_frame_p50_ms'],
+            result['controls'],
+            'n/a' if result['alloc_peak_bytes'] is None else '%d' % result['alloc_peak_bytes'],
+        ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark comparing display frame construction by tuple
+concatenation (the previous `OP1View` implementation) with `ui.SysexFrame`.
+
+Run from the repository root, outside of Live:
+
+    python benchmarks/sysex_frame.py
+
+Allocation figures need Python 3 (`tracemalloc`).
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import harness
+
+NUM_FRAMES = 20000
+
+
+def main():
+    ui = harness.load_surface_module('ui')
+    num_slots = ui.NUM_DISPLAY_CLIP_SLOTS
+
+    colors = bytearray(3 * num_slots)
+    color_by_slot_num = {i: [0x7f, 0x00, 0x7f] for i in range(num_slots)}
+    text_bytes = [ord(c) for c in '3. bass\rtrack: muted']
+
+    def concat_colors():
+        colors = []
+        for i in range(num_slots):
+            colors.extend(color_by_slot_num[i])
+        return ui.TEXT_COLOR_START_SEQUENCE + (num_slots, ) + tuple(colors) + ui.TEXT_END_SEQUENCE
+
+    def concat_text():
+        return ui.TEXT_START_SEQUENCE + (len(text_bytes), ) + tuple(text_bytes) + ui.TEXT_END_SEQUENCE
+
+    color_frame = ui.SysexFrame(ui.TEXT_COLOR_START_SEQUENCE, len(colors))
+    text_frame = ui.SysexFrame(ui.TEXT_START_SEQUENCE)
+
+    def frame_colors():
+        return color_frame.build(colors, num_slots)
+
+    def frame_text():
+        return text_frame.build(text_bytes, len(text_bytes))
+
+    text_payload = bytearray(text_bytes)
+
+    def frame_text_bytearray():
+        return text_frame.build(text_payload, len(text_payload))
+
+    assert tuple(frame_colors()) == ui.TEXT_COLOR_START_SEQUENCE + (num_slots, ) + tuple(colors) + ui.TEXT_END_SEQUENCE
+    assert tuple(frame_text()) == concat_text()
+
+    print('%-36s %14s %20s' % ('builder', 'us/frame', 'peak bytes/frame'))
+    for name, build in (
+        ('concat colors', concat_colors),
+        ('SysexFrame colors', frame_colors),
+        ('concat text', concat_text),
+        ('SysexFrame text', frame_text),
+        ('SysexFrame text (bytearray payload)', frame_text_bytearray),
+    ):
+        # Warm up so one-off buffer growth is not counted
+        build()
+        seconds = timeit.timeit(build, number=NUM_FRAMES)
+        print('%-36s %14.3f %20s' % (name, 1e6 * seconds / NUM_FRAMES, peak_bytes(build)))
+
+
+def peak_bytes(build):
+    """Peak memory allocated while building a single frame"""
+    if tracemalloc is None:
+        return 'n/a'
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        build()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+import random
+
+from .consts import *
+
+# Connection states
+# - idle: not looking for the OP-1
+# - probing: sending identity requests with backoff until one is answered
+# - connected: answering keepalive requests in time
+# - degraded: connected, but slow to answer or missing some requests
+CONNECTION_IDLE = 'idle'
+CONNECTION_PROBING = 'probing'
+CONNECTION_CONNECTED = 'connected'
+CONNECTION_DEGRADED = 'degraded'
+
+# Universal identity reply: F0 7E <device> 06 02 <manufacturer>
+# <family lsb msb> <model lsb msb> <version x4> F7
+IDENTITY_REPLY_LENGTH = 17
+IDENTITY_REPLY_HEADER = (0xf0, 0x7e)
+IDENTITY_REPLY_SUB_IDS = (0x06, 0x02)
+TEENAGE_ENGINEERING_ID = (0x00, 0x20, 0x76)
+
+
+def parse_identity_reply(midi_bytes):
+    """
+    Args:
+        midi_bytes (tuple): complete sysex message
+    Returns:
+        Tuple[int, int, Tuple[int]]|None: family, model and version of a
+            Teenage Engineering device, None for any other message
+    """
+    if len(midi_bytes) != IDENTITY_REPLY_LENGTH or midi_bytes[-1] != 0xf7:
+        return None
+    if (tuple(midi_bytes[0:2]) != IDENTITY_REPLY_HEADER
+            or tuple(midi_bytes[3:5]) != IDENTITY_REPLY_SUB_IDS
+            or tuple(midi_bytes[5:8]) != TEENAGE_ENGINEERING_ID):
+        return None
+    data = midi_bytes[2:-1]
+    if any(byte > 0x7f for byte in data):
+        return None
+    return (
+        midi_bytes[8] | (midi_bytes[9] << 7),
+        midi_bytes[10] | (midi_bytes[11] << 7),
+        tuple(midi_bytes[12:16]),
+    )
+
+
+class DeviceConnection(object):
+    """
+    Handshake with the OP-1, and watch over the link once connected.
+
+    While probing, identity requests are retried indefinitely, with a
+    jittered delay doubling up to CONNECTION_BACKOFF_DOUBLINGS times. Once
+    connected, an identity request is sent every
+    CONNECTION_KEEPALIVE_INTERVAL seconds to measure the round trip. The
+    link is degraded while the smoothed round trip exceeds
+    CONNECTION_DEGRADED_RTT or a request went unanswered, and lost after
+    CONNECTION_MAX_MISSED_PROBES unanswered requests.
+    """
+    def __init__(self, scheduler, send_probe, on_connected, on_lost, logger, rand=random.random):
+        """
+        Args:
+            scheduler (scheduler.Scheduler): runs retries and keepalives
+            send_probe (Callable[[], None]): sends an identity request
+            on_connected (Callable[[], None]): called when a probe is
+                first answered
+            on_lost (Callable[[], None]): called when keepalives stopped
+                being answered, before probing again
+        """
+        self._scheduler = scheduler
+        self._send_probe = send_probe
+        self._on_connected = on_connected
+        self._on_lost = on_lost
+        self._logger = logger
+        self._rand = rand
+
+        self.state = CONNECTION_IDLE
+        # (family, model, version) of the connected device
+        self.identity = None
+        # Smoothed keepalive round trip in seconds, None until measured
+        self.rtt = None
+        self.num_attempts = 0
+
+        self._retry_task = None
+        self._keepalive_task = None
+        self._probe_sent_at = None
+        self._num_missed_probes = 0
+
+    @property
+    def connected(self):
+        return self.state in (CONNECTION_CONNECTED, CONNECTION_DEGRADED)
+
+    def start(self):
+        """Starts probing for the device, unless already connected"""
+        if self.state != CONNECTION_IDLE:
+            return
+        self.state = CONNECTION_PROBING
+        self.num_attempts = 0
+        self._probe()
+
+    def reset(self):
+        """Forgets the device and stops all requests"""
+        self._scheduler.cancel(self._retry_task)
+        self._scheduler.cancel(self._keepalive_task)
+        self._retry_task = None
+        self._keepalive_task = None
+        self._probe_sent_at = None
+        self._num_missed_probes = 0
+        self.state = CONNECTION_IDLE
+        self.identity = None
+        self.rtt = None
+
+    def retry_delay(self, attempt):
+        """
+        Returns:
+            float: seconds to wait after `attempt`, counted from 0
+        """
+        delay = CONNECTION_RETRY_DELAY * 2 ** min(attempt, CONNECTION_BACKOFF_DOUBLINGS)
+        return delay * (1 + CONNECTION_RETRY_JITTER * (2 * self._rand() - 1))
+
+    def handle_identity_reply(self, identity):
+        """
+        Args:
+            identity (tuple): as returned by `parse_identity_reply`
+        """
+        if self.state == CONNECTION_PROBING:
+            self._scheduler.cancel(self._retry_task)
+            self._retry_task = None
+            self.state = CONNECTION_CONNECTED
+            self.identity = identity
+            self._logger.info('OP-1 Connected after %s attempts', self.num_attempts)
+            self._keepalive_task = self._scheduler.call_every(CONNECTION_KEEPALIVE_INTERVAL, self._keepalive)
+            self._on_connected()
+
+        elif self.connected and self._probe_sent_at is not None:
+            rtt = self._scheduler.now() - self._probe_sent_at
+            self._probe_sent_at = None
+            self._num_missed_probes = 0
+            if self.rtt is None:
+                self.rtt = rtt
+            else:
+                self.rtt += CONNECTION_RTT_SMOOTHING * (rtt - self.rtt)
+            self._update_health()
+
+        # Unrequested replies, e.g. late ones, are ignored
+
+    def format_rtt(self):
+        if self.rtt is None:
+            return 'n/a'
+        return '%.1fms' % (1000 * self.rtt)
+
+    def _probe(self):
+        # Scheduled before sending, the reply may arrive from within it
+        self._retry_task = self._scheduler.call_later(self.retry_delay(self.num_attempts), self._probe)
+        self.num_attempts += 1
+        self._logger.info('Attempting to connect to OP-1... (attempt %s)', self.num_attempts)
+        self._send_probe()
+
+    def _keepalive(self):
+        if self._probe_sent_at is not None:
+            self._num_missed_probes += 1
+            if self._num_missed_probes >= CONNECTION_MAX_MISSED_PROBES:
+                self._logger.warning('OP-1 stopped answering, reconnecting')
+                self.reset()
+                self._on_lost()
+                self.start()
+                return
+
+        self._probe_sent_at = self._scheduler.now()
+        self._update_health()
+        self._send_probe()
+
+    def _update_health(self):
+        degraded = self._num_missed_probes > 0 or (
+            self.rtt is not None and self.rtt > CONNECTION_DEGRADED_RTT
+        )
+        state = CONNECTION_DEGRADED if degraded else CONNECTION_CONNECTED
+        if state == self.state:
+            return
+
+        self.state = state
+        if degraded:
+            self._logger.warning(
+                'OP-1 link degraded (rtt: %s, missed: %s)',
+                self.format_rtt(),
+                self._num_missed_probes,
+            )
+        else:
+            self._logger.info('OP-1 link recovered (rtt: %s)', self.format_rtt())
@@ -19,6 +19,72 @@
 
 VERSION="1.0.9"
 
+# Logging: one of 'debug', 'info', 'warning', 'error' or 'off'
+LOG_LEVEL = 'info'
+# Log records buffered in memory and written when idle, 0 writes immediately.
+# Shift + help writes out the whole buffer.
+LOG_RING_BUFFER_SIZE = 0
+# Seconds of each display update that may be spent writing buffered records
+LOG_FLUSH_BUDGET = 0.002
+
+# File incoming MIDI is recorded to, see `journal.py`. Relative paths are
+# relative to this script's directory, None disables recording.
+MIDI_JOURNAL_PATH = None
+
+# Measure latency of every listener, shift + help writes a summary to the log
+INSTRUMENT_HANDLERS = False
+
+# Encoder turns controlling device parameters are accumulated and written
+# once per display update, and also every this many seconds while turning
+# if above 0
+ENCODER_WRITE_INTERVAL = 0
+# Encoder steps sweeping a continuous parameter across its range, and
+# while holding the encoder's push button for fine control
+ENCODER_STEPS_PER_RANGE = 127
+ENCODER_FINE_STEPS_PER_RANGE = 1270
+# Step multiplier of fast turns, as (least steps per second an encoder is
+# turned at, multiplier), fastest first. The rate is counted per display
+# update and smoothed over about ENCODER_RATE_TIME_CONSTANT seconds.
+ENCODER_ACCELERATION_CURVE = ((160, 10), (80, 5), (40, 2))
+ENCODER_RATE_TIME_CONSTANT = 0.1
+
+# Create control elements when a mode first uses them rather than all at
+# startup, see `controls.py`
+LAZY_CONTROLS = True
+
+# Budget of MIDI sent to the OP-1 once connected, in bytes per second and
+# bytes that may go out at once after a quiet period. Display frames over
+# budget wait for the next display update, see `output.py`.
+MIDI_OUTPUT_BYTES_PER_SECOND = 4000
+MIDI_OUTPUT_BURST_BYTES = 1024
+
+# Seconds before retrying to connect to the OP-1, doubled after each
+# attempt at most CONNECTION_BACKOFF_DOUBLINGS times and then kept, varied
+# by up to CONNECTION_RETRY_JITTER of itself. Retries never stop.
+CONNECTION_RETRY_DELAY = 0.5
+CONNECTION_BACKOFF_DOUBLINGS = 4
+CONNECTION_RETRY_JITTER = 0.2
+# Seconds between identity requests checking a connected OP-1, and how
+# many may go unanswered before reconnecting
+CONNECTION_KEEPALIVE_INTERVAL = 2.0
+CONNECTION_MAX_MISSED_PROBES = 2
+# Smoothed round trip of those requests in seconds above which the link
+# is reported degraded, and the weight of each new measurement
+CONNECTION_DEGRADED_RTT = 0.1
+CONNECTION_RTT_SMOOTHING = 0.25
+
+# Seconds between display frames while the OP-1 is played, 0 renders on
+# every display update, and for how long after its last input
+DISPLAY_FRAME_INTERVAL_ACTIVE = 0
+DISPLAY_ACTIVITY_HOLD = 2.0
+# Seconds between display frames otherwise, and at most under load
+DISPLAY_FRAME_INTERVAL_IDLE = 0.3
+DISPLAY_FRAME_INTERVAL_MAX = 1.0
+# Share of time rendering may take, frames are spaced out beyond it
+DISPLAY_RENDER_TIME_SHARE = 0.1
+# Seconds the selected clip's indicator is shown, then hidden
+BLINK_HALF_PERIOD = 0.5
+
 # Sentinel values
 
 BUTTON_ON = 127
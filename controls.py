@@ -0,0 +1,47 @@
+class LazyControlRegistry(object):
+    """
+    Control elements by name, each created the first time it is looked up.
+
+    Elements register with the surface for MIDI when constructed, so they
+    are created inside its component guard. Until then nothing is listening
+    to their messages, which is fine for controls no mode uses yet.
+    """
+    def __init__(self, surface):
+        self._surface = surface
+        # name -> (factory, args)
+        self._factories = {}
+        self._controls = {}
+
+    def define(self, name, factory, *args):
+        """
+        Args:
+            factory (Callable[..., object]): called with `args` to create
+                the control
+        """
+        self._factories[name] = (factory, args)
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def __len__(self):
+        return len(self._factories)
+
+    @property
+    def num_created(self):
+        return len(self._controls)
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def get(self, name):
+        control = self._controls.get(name)
+        if control is None:
+            factory, args = self._factories[name]
+            with self._surface.component_guard():
+                control = factory(*args)
+            self._controls[name] = control
+        return control
+
+    def create_all(self):
+        for name in sorted(self._factories):
+            self.get(name)
@@ -0,0 +1,177 @@
+from math import exp
+
+from .consts import *
+from .util import monotonic
+
+# How encoder turns move a parameter
+# - coarse: accelerated steps of 1/ENCODER_STEPS_PER_RANGE of the range
+# - fine: unaccelerated steps of 1/ENCODER_FINE_STEPS_PER_RANGE
+# - stepped: one value per step, for quantized parameters
+ENCODER_PROFILE_COARSE = 'coarse'
+ENCODER_PROFILE_FINE = 'fine'
+ENCODER_PROFILE_STEPPED = 'stepped'
+
+
+def encoder_profile(param, fine=False):
+    """
+    Args:
+        fine (bool): whether the fine modifier is held
+    """
+    if param is not None and param.is_quantized:
+        return ENCODER_PROFILE_STEPPED
+    return ENCODER_PROFILE_FINE if fine else ENCODER_PROFILE_COARSE
+
+
+def apply_encoder_delta(param, delta):
+    """
+    Moves a device parameter by `delta` encoder steps, clamped to its range.
+    Quantized parameters move one value per whole step.
+
+    Returns:
+        bool: whether the parameter's value changed
+    """
+    if not param.is_enabled:
+        return False
+
+    if param.is_quantized:
+        delta = int(round(delta))
+        step = 1
+    else:
+        step = (param.max - param.min) / float(ENCODER_STEPS_PER_RANGE)
+
+    value = max(param.min, min(param.max, param.value + delta * step))
+    if value == param.value:
+        return False
+    param.value = value
+    return True
+
+
+class EncoderAcceleration(object):
+    """
+    Scales encoder steps by how fast each encoder is turned.
+
+    Live delivers MIDI in batches, so the time between two CCs says little
+    about speed. Steps are instead counted per display update, and `tick`
+    turns them into a rate per encoder smoothed over the last updates.
+    Steps are scaled by the rate of the updates before them, so a single
+    burst of CCs is never accelerated.
+
+    Reversing direction restarts from unaccelerated steps, so overshooting
+    and turning back stays precise.
+    """
+    def __init__(self, num_encoders, curve=ENCODER_ACCELERATION_CURVE,
+                 time_constant=ENCODER_RATE_TIME_CONSTANT, clock=monotonic):
+        self._curve = curve
+        self._time_constant = time_constant
+        self._clock = clock
+        self._last_tick = None
+        # Smoothed steps per second, and steps since the last tick
+        self._rates = [0.0] * num_encoders
+        self._tick_steps = [0] * num_encoders
+        self._last_deltas = [0] * num_encoders
+
+    def rate(self, encoder_num):
+        return self._rates[encoder_num]
+
+    def scale(self, encoder_num, delta, profile=ENCODER_PROFILE_COARSE):
+        """
+        Returns:
+            float: `delta` in coarse steps
+        """
+        if (delta > 0) != (self._last_deltas[encoder_num] > 0):
+            self._rates[encoder_num] = 0.0
+            self._tick_steps[encoder_num] = 0
+        self._last_deltas[encoder_num] = delta
+        self._tick_steps[encoder_num] += abs(delta)
+
+        if profile == ENCODER_PROFILE_STEPPED:
+            return delta
+        if profile == ENCODER_PROFILE_FINE:
+            return delta * ENCODER_STEPS_PER_RANGE / float(ENCODER_FINE_STEPS_PER_RANGE)
+
+        rate = self._rates[encoder_num]
+        for min_rate, multiplier in self._curve:
+            if rate >= min_rate:
+                return delta * multiplier
+        return delta
+
+    def tick(self):
+        """Folds the steps counted since the last tick into the rates"""
+        now = self._clock()
+        if self._last_tick is None:
+            self._last_tick = now
+            return
+        elapsed = now - self._last_tick
+        if elapsed <= 0:
+            # Steps count towards the next tick
+            return
+        self._last_tick = now
+
+        # Weighted by time, so rates don't depend on how often Live updates
+        weight = 1 - exp(-elapsed / self._time_constant)
+        rates = self._rates
+        tick_steps = self._tick_steps
+        for encoder_num, steps in enumerate(tick_steps):
+            if steps or rates[encoder_num]:
+                rate = rates[encoder_num] + weight * (steps / elapsed - rates[encoder_num])
+                # Stopped encoders settle at 0 instead of decaying forever
+                rates[encoder_num] = rate if rate >= 1 else 0.0
+                tick_steps[encoder_num] = 0
+
+
+class EncoderDeltaCoalescer(object):
+    """
+    Accumulates relative encoder turns, so a burst of CCs within a frame
+    becomes a single parameter write and view refresh.
+    """
+    def __init__(self, num_encoders, interval=ENCODER_WRITE_INTERVAL, clock=monotonic):
+        """
+        Args:
+            interval (float): seconds after which `add` asks for a flush,
+                0 leaves flushing to the caller's regular updates
+        """
+        self._deltas = [0] * num_encoders
+        self._interval = interval
+        self._clock = clock
+        self._next_flush = 0.0
+        self.pending = False
+
+    def add(self, encoder_num, delta):
+        """
+        Args:
+            delta (float): steps turned
+        Returns:
+            bool: whether `flush` is due
+        """
+        self._deltas[encoder_num] += delta
+        self.pending = True
+        return self._interval > 0 and self._clock() >= self._next_flush
+
+    def flush(self, apply):
+        """
+        Calls `apply(encoder_num, delta)` for every encoder turned since the
+        last flush.
+
+        Returns:
+            int|None: last encoder applied
+        """
+        if not self.pending:
+            return None
+
+        last_encoder_num = None
+        deltas = self._deltas
+        for encoder_num, delta in enumerate(deltas):
+            if delta:
+                deltas[encoder_num] = 0
+                apply(encoder_num, delta)
+                last_encoder_num = encoder_num
+
+        self.pending = False
+        if self._interval > 0:
+            self._next_flush = self._clock() + self._interval
+        return last_encoder_num
+
+    def clear(self):
+        for encoder_num in range(len(self._deltas)):
+            self._deltas[encoder_num] = 0
+        self.pending = False
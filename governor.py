@@ -0,0 +1,109 @@
+from .consts import *
+from .util import monotonic
+
+
+class FrameGovernor(object):
+    """
+    Decides on which of Live's display updates the OP-1 display is
+    rendered.
+
+    - Every update while the user interacts, and for a moment after.
+    - Every DISPLAY_FRAME_INTERVAL_IDLE seconds otherwise.
+    - Less often when rendering takes more than its share of Python time
+      or output is still queued, up to DISPLAY_FRAME_INTERVAL_MAX.
+    - Whenever a view requests one, such as on blink phase changes.
+    """
+    def __init__(self, output_bytes_per_second=MIDI_OUTPUT_BYTES_PER_SECOND, clock=monotonic):
+        self._output_bytes_per_second = float(output_bytes_per_second)
+        self._clock = clock
+        self._last_now = clock()
+        self._next_frame = 0.0
+        self._active_until = 0.0
+
+        # Seconds until the next frame, as last decided
+        self.interval = 0.0
+
+    def note_activity(self):
+        """Renders on the next update and keeps the full frame rate for a while"""
+        now = self._now()
+        self._active_until = now + DISPLAY_ACTIVITY_HOLD
+        self._next_frame = now
+
+    def request_frame(self):
+        """Renders on the next update"""
+        self._next_frame = min(self._next_frame, self._now())
+
+    def frame_due(self):
+        return self._now() >= self._next_frame
+
+    def frame_rendered(self, render_seconds, pending_bytes=0):
+        """
+        Schedules the next frame.
+
+        Args:
+            render_seconds (float): time the frame took to render
+            pending_bytes (int): output still queued after sending it
+        """
+        now = self._now()
+        if now < self._active_until:
+            interval = DISPLAY_FRAME_INTERVAL_ACTIVE
+        else:
+            interval = DISPLAY_FRAME_INTERVAL_IDLE
+
+        interval = max(
+            interval,
+            render_seconds / DISPLAY_RENDER_TIME_SHARE,
+            pending_bytes / self._output_bytes_per_second,
+        )
+        self.interval = min(interval, DISPLAY_FRAME_INTERVAL_MAX)
+        self._next_frame = now + self.interval
+
+    def _now(self):
+        now = self._clock()
+        step = now - self._last_now
+        if step < 0:
+            # The clock stepped back, count it as no time passing
+            self._next_frame += step
+            self._active_until += step
+        self._last_now = now
+        return now
+
+
+class BlinkPhase(object):
+    """
+    Alternates between on and off every `half_period` seconds on a
+    scheduler, starting on, and calls `on_change` at every change.
+
+    Stops once a phase went unread, e.g. when its view is no longer shown,
+    and starts again when next read.
+    """
+    def __init__(self, scheduler, on_change, half_period=BLINK_HALF_PERIOD):
+        self._scheduler = scheduler
+        self._on_change = on_change
+        self._half_period = half_period
+        self._task = None
+        self._on = True
+        self._read = False
+
+    def restart(self):
+        self._scheduler.cancel(self._task)
+        self._task = self._scheduler.call_every(self._half_period, self._toggle)
+        self._on = True
+
+    def stop(self):
+        self._scheduler.cancel(self._task)
+        self._task = None
+
+    def is_on(self):
+        if self._task is None:
+            self.restart()
+        self._read = True
+        return self._on
+
+    def _toggle(self):
+        if not self._read:
+            self.stop()
+            return
+        self._read = False
+        self._on = not self._on
+        self._on_change()
@@ -0,0 +1,174 @@
+"""
+Headless harness for running the OP-1 surface outside of Ableton Live.
+
+`harness/stubs` provides stand-ins for the `Live`, `_Framework` and `_APC`
+modules that only exist inside Live, and `harness.live_set` fake songs of
+any size. Typical use, from the repository root:
+
+    import harness
+    surface = harness.create_surface(num_tracks=500, num_scenes=1000)
+    harness.connect(surface)
+    surface.update_display()
+    print(surface.c_instance.sent_bytes)
+
+Not loaded by Live, which only imports the package's `__init__`.
+"""
+from __future__ import absolute_import
+
+import os
+import sys
+
+from . import live_set
+
+HARNESS_DIR = os.path.dirname(os.path.abspath(__file__))
+STUBS_DIR = os.path.join(HARNESS_DIR, 'stubs')
+PACKAGE_DIR = os.path.dirname(HARNESS_DIR)
+
+# Module name the surface package is loaded under, the package directory
+# itself may have any name
+PACKAGE_NAME = 'op1_surface'
+
+# Identity request the surface sends, `OP1.ID_SEQUENCE`, and the reply of
+# an OP-1
+OP1_IDENTITY_REQUEST = (0xf0, 0x7e, 0x7f, 0x06, 0x01, 0xf7)
+OP1_IDENTITY_REPLY = (
+    0xf0, 0x7e, 0x00, 0x06, 0x02, 0x00, 0x20, 0x76,
+    0x00, 0x01, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0xf7,
+)
+
+
+def install_stubs():
+    """Makes the stand-in Live modules importable"""
+    if STUBS_DIR not in sys.path:
+        sys.path.insert(0, STUBS_DIR)
+
+
+def load_surface_package():
+    """
+    Returns:
+        module: the surface package, imported under PACKAGE_NAME
+    """
+    install_stubs()
+    if PACKAGE_NAME in sys.modules:
+        return sys.modules[PACKAGE_NAME]
+
+    try:
+        import importlib.util
+    except ImportError:
+        import imp
+        return imp.load_module(PACKAGE_NAME, None, PACKAGE_DIR, ('', '', imp.PKG_DIRECTORY))
+
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE_NAME,
+        os.path.join(PACKAGE_DIR, '__init__.py'),
+        submodule_search_locations=[PACKAGE_DIR],
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE_NAME] = package
+    try:
+        spec.loader.exec_module(package)
+    except Exception:
+        del sys.modules[PACKAGE_NAME]
+        raise
+    return package
+
+
+def load_surface_module(name):
+    """e.g. `load_surface_module('ui')`"""
+    package = load_surface_package()
+    __import__('%s.%s' % (PACKAGE_NAME, name))
+    return getattr(package, name)
+
+
+class FakeCInstance(object):
+    """
+    Stands in for the `c_instance` Live passes to `create_instance`,
+    capturing everything the surface sends.
+    """
+    def __init__(self, song):
+        self._song = song
+        self.sent_messages = []
+        self.sent_bytes = 0
+        self.log_messages = []
+        self.shown_messages = []
+        self.num_midi_map_rebuilds = 0
+        self.capture_messages = True
+        # Surface identity requests are answered to, as by a connected OP-1
+        self.identity_responder = None
+
+    def song(self):
+        return self._song
+
+    def send_midi(self, midi_event_bytes):
+        self.sent_bytes += len(midi_event_bytes)
+        if self.capture_messages:
+            self.sent_messages.append(tuple(midi_event_bytes))
+        if self.identity_responder is not None and tuple(midi_event_bytes) == OP1_IDENTITY_REQUEST:
+            self.identity_responder.handle_sysex(OP1_IDENTITY_REPLY)
+
+    def clear_sent(self):
+        self.sent_messages = []
+        self.sent_bytes = 0
+
+    def log_message(self, message):
+        self.log_messages.append(message)
+
+    def show_message(self, message):
+        self.shown_messages.append(message)
+
+    def request_rebuild_midi_map(self):
+        self.num_midi_map_rebuilds += 1
+
+
+def parameter_names_by_class():
+    """Parameter names the surface maps by device class"""
+    modes = load_surface_module('modes')
+    return dict(modes.DEFAULT_DEVICE_PARAM_MAPPINGS)
+
+
+def build_song(**kwargs):
+    """`live_set.build_song`, with devices carrying the names the surface maps"""
+    install_stubs()
+    kwargs.setdefault('parameter_names_by_class', parameter_names_by_class())
+    return live_set.build_song(**kwargs)
+
+
+def create_surface(song=None, clock=None, **song_kwargs):
+    """
+    Instantiates the surface through the package's `create_instance`.
+
+    Args:
+        song (live_set.Song): built from `song_kwargs` if not given
+        clock (scheduler.VirtualClock): times the surface instead of the
+            monotonic clock
+    Returns:
+        OP1: with its FakeCInstance available as `surface.c_instance`
+    """
+    package = load_surface_package()
+    if song is None:
+        song = build_song(**song_kwargs)
+    c_instance = FakeCInstance(song)
+    if clock is None:
+        surface = package.create_instance(c_instance)
+    else:
+        surface = package.OP1(c_instance, clock=clock)
+    surface.c_instance = c_instance
+    return surface
+
+
+def connect(surface):
+    """
+    Completes the connection handshake as a real OP-1 would, and keeps
+    answering the surface's keepalive requests.
+    """
+    surface.c_instance.identity_responder = surface
+    surface.update_display()
+
+
+def send_cc(surface, identifier, value, channel=0):
+    surface.handle_nonsysex((0xb0 | channel, identifier, value))
+
+
+def send_note(surface, identifier, velocity, channel=0):
+    status = 0x90 if velocity else 0x80
+    surface.handle_nonsysex((status | channel, identifier, velocity))
@@ -0,0 +1,305 @@
+"""
+Fake Live API objects and a builder for live sets of arbitrary size.
+
+Objects implement the `add_<prop>_listener`, `remove_<prop>_listener` and
+`<prop>_has_listener` methods of the Live API for their observable
+properties, and notify listeners when those properties are assigned.
+Like Live, adding a connected listener or removing an unknown one raises.
+"""
+from functools import partial
+
+# Same palette as the surface's util.LIVE_CLIP_COLORS
+CLIP_COLORS = (
+    15549221, 12411136, 11569920, 8754719, 5480241, 695438, 31421, 197631,
+    3101346, 6441901, 8092539, 3947580, 16712965, 12565097, 10927616, 8046132,
+)
+
+DEFAULT_DEVICE_CLASS_NAMES = ('Compressor2', 'Reverb', 'InstrumentVector', 'AutoFilter')
+
+
+class LiveObject(object):
+    _observable_properties = ()
+    _next_live_ptr = [1]
+
+    def __init__(self, **properties):
+        self.__dict__['_listeners'] = {}
+        self.__dict__['_live_ptr'] = LiveObject._next_live_ptr[0]
+        LiveObject._next_live_ptr[0] += 1
+        self.__dict__.update(properties)
+
+    def __setattr__(self, name, value):
+        self.__dict__[name] = value
+        if name in self._observable_properties:
+            self.notify(name)
+
+    def __getattr__(self, name):
+        if name.startswith('add_') and name.endswith('_listener'):
+            return partial(self._add_listener, self._observable(name[4:-9]))
+        if name.startswith('remove_') and name.endswith('_listener'):
+            return partial(self._remove_listener, self._observable(name[7:-9]))
+        if name.endswith('_has_listener'):
+            return partial(self._has_listener, self._observable(name[:-13]))
+        raise AttributeError(name)
+
+    def _observable(self, prop):
+        if prop not in self._observable_properties:
+            raise AttributeError('%s has no observable property %s' % (type(self).__name__, prop))
+        return prop
+
+    def _add_listener(self, prop, callback):
+        if self._has_listener(prop, callback):
+            raise RuntimeError('Listener already connected')
+        self._listeners.setdefault(prop, []).append(callback)
+
+    def _remove_listener(self, prop, callback):
+        listeners = self._listeners.get(prop, [])
+        for i, listener in enumerate(listeners):
+            if listener == callback:
+                del listeners[i]
+                return
+        raise RuntimeError('Listener not connected')
+
+    def _has_listener(self, prop, callback):
+        return any(listener == callback for listener in self._listeners.get(prop, ()))
+
+    def listener_count(self, prop=None):
+        if prop is not None:
+            return len(self._listeners.get(prop, ()))
+        return sum(len(listeners) for listeners in self._listeners.values())
+
+    def notify(self, prop):
+        for listener in list(self._listeners.get(prop, ())):
+            listener()
+
+
+class LazyVector(object):
+    """
+    Read-only sequence whose items are created on first access, so sets
+    with hundreds of thousands of clip slots stay cheap to build.
+    """
+    def __init__(self, length, factory):
+        self._items = [None] * length
+        self._factory = factory
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self._items)
+        item = self._items[index]
+        if item is None:
+            item = self._items[index] = self._factory(index)
+        return item
+
+    def __iter__(self):
+        for i in range(len(self._items)):
+            yield self[i]
+
+
+class DeviceParameter(LiveObject):
+    _observable_properties = ('value', 'name')
+
+    def __init__(self, name, value=0.0, min=0.0, max=1.0, is_quantized=False):
+        super(DeviceParameter, self).__init__(
+            name=name,
+            value=value,
+            min=min,
+            max=max,
+            default_value=value,
+            is_quantized=is_quantized,
+            is_enabled=True,
+            value_items=(),
+        )
+
+    def str_for_value(self, value):
+        return '%.2f' % value
+
+
+class Device(LiveObject):
+    _observable_properties = ('name', 'parameters')
+
+    def __init__(self, name, class_name, parameters):
+        super(Device, self).__init__(
+            name=name,
+            class_name=class_name,
+            class_display_name=class_name,
+            parameters=tuple(parameters),
+        )
+
+
+class Clip(LiveObject):
+    _observable_properties = ('name', 'color', 'playing_status')
+
+    def __init__(self, name, color):
+        super(Clip, self).__init__(name=name, color=color, is_playing=False)
+
+
+class ClipSlot(LiveObject):
+    _observable_properties = ('has_clip', 'playing_status', 'has_stop_button')
+
+    def __init__(self, clip=None):
+        super(ClipSlot, self).__init__(
+            clip=clip,
+            has_clip=clip is not None,
+            has_stop_button=True,
+            playing_status=0,
+            is_playing=False,
+            fire_count=0,
+        )
+
+    def fire(self):
+        self.fire_count += 1
+
+    def stop(self):
+        pass
+
+    def delete_clip(self):
+        self.__dict__['clip'] = None
+        self.has_clip = False
+
+    def create_clip(self, name='', color=CLIP_COLORS[0]):
+        self.__dict__['clip'] = Clip(name, color)
+        self.has_clip = True
+
+
+class TrackView(LiveObject):
+    _observable_properties = ('selected_device',)
+
+    def __init__(self, selected_device=None):
+        super(TrackView, self).__init__(selected_device=selected_device)
+
+
+class Track(LiveObject):
+    _observable_properties = (
+        'name', 'mute', 'solo', 'arm', 'color', 'clip_slots', 'devices',
+        'playing_slot_index', 'fired_slot_index',
+    )
+
+    def __init__(self, name, clip_slots=(), devices=(), can_be_armed=True):
+        super(Track, self).__init__(
+            name=name,
+            mute=False,
+            solo=False,
+            arm=False,
+            color=CLIP_COLORS[0],
+            can_be_armed=can_be_armed,
+            clip_slots=clip_slots,
+            devices=tuple(devices),
+            view=TrackView(devices[0] if devices else None),
+        )
+
+
+class Scene(LiveObject):
+    _observable_properties = ('name', 'color')
+
+    def __init__(self, name):
+        super(Scene, self).__init__(name=name, color=CLIP_COLORS[0], clip_slots=())
+
+
+class SongView(LiveObject):
+    _observable_properties = (
+        'selected_track', 'selected_scene', 'selected_parameter', 'selected_chain',
+    )
+
+    def __init__(self, selected_track, selected_scene):
+        super(SongView, self).__init__(
+            selected_track=selected_track,
+            selected_scene=selected_scene,
+            selected_parameter=None,
+            selected_chain=None,
+        )
+
+
+class Song(LiveObject):
+    _observable_properties = (
+        'tracks', 'scenes', 'return_tracks', 'visible_tracks',
+        'is_playing', 'metronome', 'tempo', 'appointed_device',
+    )
+
+    def __init__(self, tracks, scenes, return_tracks=(), master_track=None):
+        super(Song, self).__init__(
+            tracks=tuple(tracks),
+            visible_tracks=tuple(tracks),
+            scenes=tuple(scenes),
+            return_tracks=tuple(return_tracks),
+            master_track=master_track or Track('Master', can_be_armed=False),
+            is_playing=False,
+            metronome=False,
+            tempo=120.0,
+            appointed_device=None,
+        )
+        self.__dict__['view'] = SongView(
+            self.tracks[0] if self.tracks else self.master_track,
+            self.scenes[0] if self.scenes else None,
+        )
+
+
+def make_device(class_name, num_parameters, parameter_names=()):
+    """
+    Args:
+        class_name (str): Live device class, e.g. 'Compressor2'
+        num_parameters (int): total parameters, including 'Device On'
+        parameter_names (Iterable[str]): names to use ahead of generic ones
+    """
+    names = ['Device On']
+    for name in parameter_names:
+        if name is not None and name not in names:
+            names.append(name)
+    while len(names) < num_parameters:
+        names.append('Macro %s' % len(names))
+    parameters = [DeviceParameter(name, value=0.5) for name in names[:max(num_parameters, 1)]]
+    return Device(class_name, class_name, parameters)
+
+
+def _slot_has_clip(track_num, scene_num, clip_density):
+    # Deterministic pseudo-random pattern, stable across runs
+    return (track_num * 7919 + scene_num * 104729) % 1000 < clip_density * 1000
+
+
+def build_song(num_tracks=8, num_scenes=8, clip_density=0.5, num_devices=1,
+               num_device_parameters=16, num_return_tracks=2,
+               device_class_names=DEFAULT_DEVICE_CLASS_NAMES, parameter_names_by_class=None):
+    """
+    Builds a fake song. Clip slots are created lazily on first access.
+
+    Args:
+        clip_density (float): fraction of clip slots holding a clip
+        num_devices (int): devices on every track
+        num_device_parameters (int): parameters of every device
+        parameter_names_by_class (Dict[str, List[str]]): names given to the
+            first parameters of devices of a class, e.g. those the surface
+            maps by name
+    """
+    parameter_names_by_class = parameter_names_by_class or {}
+
+    def make_clip_slot(track_num, scene_num):
+        if not _slot_has_clip(track_num, scene_num, clip_density):
+            return ClipSlot()
+        color = CLIP_COLORS[(track_num + scene_num) % len(CLIP_COLORS)]
+        return ClipSlot(Clip('Clip %s.%s' % (track_num, scene_num), color))
+
+    tracks = []
+    for track_num in range(num_tracks):
+        devices = []
+        for device_num in range(num_devices):
+            class_name = device_class_names[(track_num + device_num) % len(device_class_names)]
+            devices.append(make_device(
+                class_name,
+                num_device_parameters,
+                parameter_names_by_class.get(class_name, ()),
+            ))
+        tracks.append(Track(
+            'Track %s' % (track_num + 1),
+            clip_slots=LazyVector(num_scenes, partial(make_clip_slot, track_num)),
+            devices=devices,
+        ))
+
+    scenes = [Scene('Scene %s' % (scene_num + 1)) for scene_num in range(num_scenes)]
+    return_tracks = [
+        Track('Return %s' % chr(ord('A') + i), can_be_armed=False)
+        for i in range(num_return_tracks)
+    ]
+    return Song(tracks, scenes, return_tracks)
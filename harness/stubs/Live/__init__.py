@@ -0,0 +1,8 @@
+"""
+Stand-in for Live's embedded `Live` module, for running the surface
+outside of Ableton. Only what the surface scripts use is provided.
+
+Fake Live API objects (songs, tracks, clips, devices) are in
+`harness.live_set`.
+"""
+from . import MidiMap
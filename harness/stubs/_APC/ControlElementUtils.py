@@ -0,0 +1,11 @@
+from _Framework.ButtonElement import ButtonElement
+from _Framework.InputControlElement import MIDI_CC_TYPE
+from _Framework.InputControlElement import MIDI_NOTE_TYPE
+
+
+def make_button(channel, identifier, *args, **kwargs):
+    return ButtonElement(True, MIDI_NOTE_TYPE, channel, identifier, *args, **kwargs)
+
+
+def make_pedal_button(identifier, *args, **kwargs):
+    return ButtonElement(True, MIDI_CC_TYPE, 0, identifier, *args, **kwargs)
@@ -0,0 +1,29 @@
+from _Framework.ControlSurfaceComponent import ControlSurfaceComponent
+
+
+class _ButtonSlot(object):
+    def __init__(self, component):
+        self._component = component
+        self.control_element = None
+
+    def set_control_element(self, control):
+        if control is not self.control_element:
+            self.control_element = control
+            self._component._request_rebuild()
+
+
+class DetailViewCntrlComponent(ControlSurfaceComponent):
+    def __init__(self, *args, **kwargs):
+        super(DetailViewCntrlComponent, self).__init__(*args, **kwargs)
+        self.device_nav_left_button = _ButtonSlot(self)
+        self.device_nav_right_button = _ButtonSlot(self)
+        self._detail_toggle_button = None
+        self._device_clip_toggle_button = None
+
+    def set_detail_toggle_button(self, button):
+        self._detail_toggle_button = button
+        self._request_rebuild()
+
+    def set_device_clip_toggle_button(self, button):
+        self._device_clip_toggle_button = button
+        self._request_rebuild()
@@ -0,0 +1,24 @@
+from .InputControlElement import InputControlElement
+
+
+class ButtonElement(InputControlElement):
+    def __init__(self, is_momentary, msg_type, channel, identifier, resource_type=None, *args, **kwargs):
+        super(ButtonElement, self).__init__(msg_type, channel, identifier, *args, **kwargs)
+        self._is_momentary = bool(is_momentary)
+        self._is_pressed = False
+
+    def is_momentary(self):
+        return self._is_momentary
+
+    def is_pressed(self):
+        return self._is_pressed
+
+    def receive_value(self, value):
+        self._is_pressed = bool(value)
+        super(ButtonElement, self).receive_value(value)
+
+    def turn_on(self):
+        pass
+
+    def turn_off(self):
+        pass
@@ -0,0 +1,3 @@
+class ButtonMatrixElement(object):
+    def __init__(self, rows=None, *args, **kwargs):
+        self._rows = [list(row) for row in rows or []]
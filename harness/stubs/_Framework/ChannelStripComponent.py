@@ -0,0 +1,50 @@
+from .ControlSurfaceComponent import ControlSurfaceComponent
+
+_CONTROL_NAMES = (
+    'volume_control',
+    'pan_control',
+    'send_controls',
+    'mute_button',
+    'solo_button',
+    'arm_button',
+)
+
+
+class ChannelStripComponent(ControlSurfaceComponent):
+    def __init__(self, *args, **kwargs):
+        super(ChannelStripComponent, self).__init__(*args, **kwargs)
+        self._track = None
+        self._controls = dict.fromkeys(_CONTROL_NAMES)
+
+    @property
+    def track(self):
+        return self._track
+
+    def set_track(self, track):
+        self._track = track
+
+    def _set_control(self, name, control):
+        if control is not self._controls[name]:
+            self._controls[name] = control
+            self._request_rebuild()
+
+    def control(self, name):
+        return self._controls[name]
+
+    def set_volume_control(self, control):
+        self._set_control('volume_control', control)
+
+    def set_pan_control(self, control):
+        self._set_control('pan_control', control)
+
+    def set_send_controls(self, controls):
+        self._set_control('send_controls', tuple(controls) if controls is not None else None)
+
+    def set_mute_button(self, button):
+        self._set_control('mute_button', button)
+
+    def set_solo_button(self, button):
+        self._set_control('solo_button', button)
+
+    def set_arm_button(self, button):
+        self._set_control('arm_button', button)
@@ -0,0 +1,4 @@
+class ComboElement(object):
+    def __init__(self, control=None, modifiers=None, *args, **kwargs):
+        self._control = control
+        self._modifiers = list(modifiers or [])
@@ -0,0 +1,144 @@
+"""
+Stand-in for Live's `_Framework.ControlSurface`, driven by a fake
+`c_instance` such as `harness.FakeCInstance`.
+"""
+from contextlib import contextmanager
+
+from .InputControlElement import MIDI_CC_STATUS
+from .InputControlElement import MIDI_CC_TYPE
+from .InputControlElement import MIDI_NOTE_OFF_STATUS
+from .InputControlElement import MIDI_NOTE_ON_STATUS
+from .InputControlElement import MIDI_NOTE_TYPE
+from .InputControlElement import MIDI_PB_STATUS
+from .InputControlElement import MIDI_PB_TYPE
+from .InputControlElement import _building_surface
+
+_MSG_TYPE_BY_STATUS = {
+    MIDI_NOTE_ON_STATUS: MIDI_NOTE_TYPE,
+    MIDI_NOTE_OFF_STATUS: MIDI_NOTE_TYPE,
+    MIDI_CC_STATUS: MIDI_CC_TYPE,
+    MIDI_PB_STATUS: MIDI_PB_TYPE,
+}
+
+
+class ControlSurface(object):
+    def __init__(self, c_instance=None, *args, **kwargs):
+        self._c_instance = c_instance
+        self._controls = []
+        self._components = []
+        self._controls_by_message = {}
+
+        self._in_component_guard = False
+        self._rebuild_requests_during_guard = 0
+
+    def song(self):
+        return self._c_instance.song()
+
+    def application(self):
+        return None
+
+    def log_message(self, *message):
+        self._c_instance.log_message(' '.join(map(str, message)))
+
+    def show_message(self, message):
+        self._c_instance.show_message(message)
+
+    @property
+    def components(self):
+        return tuple(self._components)
+
+    @property
+    def controls(self):
+        return tuple(self._controls)
+
+    #
+    # Component and control registration
+    #
+
+    @contextmanager
+    def component_guard(self):
+        if self._in_component_guard:
+            yield
+            return
+
+        previous_surface = _building_surface[0]
+        _building_surface[0] = self
+        self._in_component_guard = True
+        try:
+            yield
+        finally:
+            self._in_component_guard = False
+            _building_surface[0] = previous_surface
+            if self._rebuild_requests_during_guard:
+                self._rebuild_requests_during_guard = 0
+                self.request_rebuild_midi_map()
+
+    def _register_control(self, control):
+        self._controls.append(control)
+        key = (control.message_type(), control.message_channel(), control.message_identifier())
+        self._controls_by_message.setdefault(key, []).append(control)
+
+    def _register_component(self, component):
+        self._components.append(component)
+
+    def request_rebuild_midi_map(self):
+        if self._in_component_guard:
+            self._rebuild_requests_during_guard += 1
+        else:
+            self._c_instance.request_rebuild_midi_map()
+
+    #
+    # Live callbacks
+    #
+
+    def build_midi_map(self, midi_map_handle):
+        pass
+
+    def refresh_state(self):
+        pass
+
+    def update_display(self):
+        pass
+
+    def connect_script_instances(self, instanciated_scripts):
+        pass
+
+    def suggest_input_port(self):
+        return ''
+
+    def suggest_output_port(self):
+        return ''
+
+    def can_lock_to_devices(self):
+        return False
+
+    def disconnect(self):
+        for component in self._components:
+            component.disconnect()
+
+    def handle_sysex(self, midi_bytes):
+        pass
+
+    def handle_nonsysex(self, midi_bytes):
+        status = midi_bytes[0] & 0xf0
+        msg_type = _MSG_TYPE_BY_STATUS.get(status)
+        if msg_type is None:
+            return
+
+        channel = midi_bytes[0] & 0x0f
+        if msg_type == MIDI_PB_TYPE:
+            identifier = None
+            value = midi_bytes[1] + (midi_bytes[2] << 7)
+        else:
+            identifier = midi_bytes[1]
+            value = midi_bytes[2]
+            if status == MIDI_NOTE_OFF_STATUS:
+                value = 0
+
+        with self.component_guard():
+            for control in self._controls_by_message.get((msg_type, channel, identifier), ()):
+                control.receive_value(value)
+
+    def _send_midi(self, midi_event_bytes, optimized=None):
+        self._c_instance.send_midi(midi_event_bytes)
+        return True
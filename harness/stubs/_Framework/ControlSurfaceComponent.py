@@ -0,0 +1,28 @@
+from .InputControlElement import _building_surface
+
+
+class ControlSurfaceComponent(object):
+    def __init__(self, *args, **kwargs):
+        self._is_enabled = kwargs.get('is_enabled', True)
+        self._surface = _building_surface[0]
+        if self._surface is not None:
+            self._surface._register_component(self)
+
+    def song(self):
+        return self._surface.song()
+
+    def is_enabled(self):
+        return self._is_enabled
+
+    def set_enabled(self, enable):
+        self._is_enabled = bool(enable)
+
+    def _request_rebuild(self):
+        if self._surface is not None:
+            self._surface.request_rebuild_midi_map()
+
+    def disconnect(self):
+        pass
+
+    def update(self):
+        pass
@@ -0,0 +1,25 @@
+import Live
+
+from .InputControlElement import InputControlElement
+
+_RELATIVE_MAP_MODES = (
+    Live.MidiMap.MapMode.relative_two_compliment,
+    Live.MidiMap.MapMode.relative_smooth_two_compliment,
+)
+
+
+class EncoderElement(InputControlElement):
+    def __init__(self, msg_type, channel, identifier, map_mode, *args, **kwargs):
+        super(EncoderElement, self).__init__(msg_type, channel, identifier, *args, **kwargs)
+        self._map_mode = map_mode
+
+    def message_map_mode(self):
+        return self._map_mode
+
+    def _map_value_to_parameter(self, parameter, value):
+        if self._map_mode not in _RELATIVE_MAP_MODES:
+            return super(EncoderElement, self)._map_value_to_parameter(parameter, value)
+
+        delta = value - 128 if value >= 64 else value
+        step = (parameter.max - parameter.min) / 127.0
+        parameter.value = max(parameter.min, min(parameter.max, parameter.value + delta * step))
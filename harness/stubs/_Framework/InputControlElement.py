@@ -0,0 +1,102 @@
+"""
+Stand-in for Live's `_Framework.InputControlElement`.
+
+Controls register with the surface that is building components, which
+routes incoming MIDI to them through `receive_value`.
+"""
+MIDI_NOTE_TYPE = 0
+MIDI_CC_TYPE = 1
+MIDI_PB_TYPE = 2
+MIDI_SYSEX_TYPE = 3
+MIDI_INVALID_TYPE = 4
+
+MIDI_NOTE_ON_STATUS = 144
+MIDI_NOTE_OFF_STATUS = 128
+MIDI_CC_STATUS = 176
+MIDI_PB_STATUS = 224
+
+# Surface currently inside `component_guard`, set by `ControlSurface`
+_building_surface = [None]
+
+
+class InputControlElement(object):
+    def __init__(self, msg_type, channel, identifier, name=None, *args, **kwargs):
+        self._msg_type = msg_type
+        self._original_channel = channel
+        self._original_identifier = identifier
+        self.name = name
+
+        self._value_listeners = []
+        self._parameter_to_map_to = None
+        self._last_received_value = None
+
+        surface = _building_surface[0]
+        if surface is not None:
+            surface._register_control(self)
+
+    def message_type(self):
+        return self._msg_type
+
+    def message_channel(self):
+        return self._original_channel
+
+    def message_identifier(self):
+        return self._original_identifier
+
+    def mapped_parameter(self):
+        return self._parameter_to_map_to
+
+    def connect_to(self, parameter):
+        if parameter != self._parameter_to_map_to:
+            self._parameter_to_map_to = parameter
+            self._request_rebuild()
+
+    def release_parameter(self):
+        if self._parameter_to_map_to is not None:
+            self._parameter_to_map_to = None
+            self._request_rebuild()
+
+    def _request_rebuild(self):
+        surface = _building_surface[0]
+        if surface is not None:
+            surface.request_rebuild_midi_map()
+
+    #
+    # Value listeners
+    #
+
+    def add_value_listener(self, callback, identify_sender=False):
+        if self.value_has_listener(callback):
+            return
+        self._value_listeners.append((callback, identify_sender))
+
+    def remove_value_listener(self, callback):
+        # Unlike Live API objects, framework elements ignore unknown listeners
+        for i, (listener, _) in enumerate(self._value_listeners):
+            if listener == callback:
+                del self._value_listeners[i]
+                return
+
+    def value_has_listener(self, callback):
+        return any(listener == callback for listener, _ in self._value_listeners)
+
+    def value_listener_count(self):
+        return len(self._value_listeners)
+
+    def receive_value(self, value):
+        self._last_received_value = value
+        parameter = self._parameter_to_map_to
+        if parameter is not None:
+            self._map_value_to_parameter(parameter, value)
+        for listener, identify_sender in list(self._value_listeners):
+            if identify_sender:
+                listener(value, self)
+            else:
+                listener(value)
+
+    def _map_value_to_parameter(self, parameter, value):
+        """Live applies values of mapped controls natively"""
+        parameter.value = parameter.min + (parameter.max - parameter.min) * value / 127.0
+
+    def send_value(self, value, force=False):
+        pass
@@ -0,0 +1,3 @@
+class Layer(object):
+    def __init__(self, priority=None, **controls):
+        self._controls = controls
@@ -0,0 +1,42 @@
+from .ChannelStripComponent import ChannelStripComponent
+from .ControlSurfaceComponent import ControlSurfaceComponent
+
+
+class MixerComponent(ControlSurfaceComponent):
+    def __init__(self, num_tracks=0, num_returns=0, *args, **kwargs):
+        super(MixerComponent, self).__init__(*args, **kwargs)
+        self._channel_strips = [ChannelStripComponent() for _ in range(num_tracks)]
+        self._return_strips = [ChannelStripComponent() for _ in range(num_returns)]
+        self._selected_strip = ChannelStripComponent()
+        self._prev_track_button = None
+        self._next_track_button = None
+
+        song = self.song()
+        for track, strip in zip(song.tracks, self._channel_strips):
+            strip.set_track(track)
+        for track, strip in zip(song.return_tracks, self._return_strips):
+            strip.set_track(track)
+
+        song.view.add_selected_track_listener(self._on_selected_track_changed)
+        self._on_selected_track_changed()
+
+    def disconnect(self):
+        self.song().view.remove_selected_track_listener(self._on_selected_track_changed)
+
+    def _on_selected_track_changed(self):
+        self._selected_strip.set_track(self.song().view.selected_track)
+
+    def channel_strip(self, index):
+        return self._channel_strips[index]
+
+    def return_strip(self, index):
+        return self._return_strips[index]
+
+    def selected_strip(self):
+        return self._selected_strip
+
+    def set_select_buttons(self, next_button, prev_button):
+        if (next_button, prev_button) != (self._next_track_button, self._prev_track_button):
+            self._next_track_button = next_button
+            self._prev_track_button = prev_button
+            self._request_rebuild()
@@ -0,0 +1,6 @@
+class ExclusiveResource(object):
+    pass
+
+
+class PrioritizedResource(ExclusiveResource):
+    pass
@@ -0,0 +1,12 @@
+from .ControlSurfaceComponent import ControlSurfaceComponent
+
+
+class TransportComponent(ControlSurfaceComponent):
+    def __init__(self, *args, **kwargs):
+        super(TransportComponent, self).__init__(*args, **kwargs)
+        self._metronome_button = None
+
+    def set_metronome_button(self, button):
+        if button is not self._metronome_button:
+            self._metronome_button = button
+            self._request_rebuild()
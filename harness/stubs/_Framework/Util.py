@@ -0,0 +1,12 @@
+class lazy_attribute(object):
+    """Computes an attribute on first access and stores it on the instance"""
+    def __init__(self, func, name=None):
+        self.func = func
+        self.__name__ = name or func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        result = obj.__dict__[self.__name__] = self.func(obj)
+        return result
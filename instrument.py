@@ -0,0 +1,118 @@
+from bisect import bisect_left
+
+from .util import monotonic
+
+# Upper bounds in microseconds of the latency histogram buckets, a last
+# bucket counts slower calls
+HISTOGRAM_BUCKET_BOUNDS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 100000)
+
+
+class HandlerStats(object):
+    """Call count and latency histogram of one handler"""
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKET_BOUNDS) + 1)
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect_left(HISTOGRAM_BUCKET_BOUNDS, seconds * 1e6)] += 1
+
+    def percentile(self, fraction):
+        """
+        Returns:
+            int|None: upper bound in microseconds of the bucket holding the
+                percentile, None if it is in the overflow bucket
+        """
+        threshold = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= threshold and count:
+                return HISTOGRAM_BUCKET_BOUNDS[i] if i < len(HISTOGRAM_BUCKET_BOUNDS) else None
+        return None
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(self.buckets)
+
+
+class Instrumentation(object):
+    """
+    Opt-in latency measurement of the script's listeners.
+
+    Handlers are wrapped once, when the listener is created, so the same
+    wrapper is given to both `add_*_listener` and `remove_*_listener`.
+    When disabled, `wrap` returns handlers unchanged and costs nothing at
+    call time.
+    """
+    def __init__(self, enabled, clock=monotonic):
+        self.enabled = enabled
+        self._clock = clock
+        self._stats = {}
+
+    def wrap(self, name, handler):
+        """
+        Args:
+            name (str): stats are shared by handlers wrapped with one name
+        """
+        if not self.enabled:
+            return handler
+
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = HandlerStats(name)
+        clock = self._clock
+
+        def instrumented(*args, **kwargs):
+            start = clock()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                stats.record(clock() - start)
+        return instrumented
+
+    def wrap_methods(self, obj, *method_names):
+        """Replaces methods of `obj` by instrumented ones, named after its class"""
+        if not self.enabled:
+            return
+        for method_name in method_names:
+            name = '%s.%s' % (type(obj).__name__, method_name)
+            setattr(obj, method_name, self.wrap(name, getattr(obj, method_name)))
+
+    def reset(self):
+        for stats in self._stats.values():
+            stats.reset()
+
+    def summary(self):
+        """
+        Returns:
+            List[str]: one line per called handler, most total time first
+        """
+        if not self.enabled:
+            return ['Handler instrumentation disabled, see INSTRUMENT_HANDLERS']
+
+        def format_bound(bound):
+            return '<=%sus' % bound if bound is not None else '>%sus' % HISTOGRAM_BUCKET_BOUNDS[-1]
+
+        lines = []
+        called = [stats for stats in self._stats.values() if stats.count]
+        for stats in sorted(called, key=lambda stats: stats.total, reverse=True):
+            lines.append('%s: %d calls, total %.1fms, mean %.0fus, p50 %s, p99 %s, max %.0fus, histogram %s' % (
+                stats.name,
+                stats.count,
+                stats.total * 1e3,
+                stats.total * 1e6 / stats.count,
+                format_bound(stats.percentile(0.5)),
+                format_bound(stats.percentile(0.99)),
+                stats.max * 1e6,
+                stats.buckets,
+            ))
+        return lines or ['No instrumented handler called']
@@ -0,0 +1,170 @@
+import struct
+import time
+
+try:
+    import mmap
+except ImportError:
+    # Journals are then read into memory instead
+    mmap = None
+
+from .util import monotonic
+
+# Journal layout: one header followed by fixed-width records, so a journal
+# can be memory-mapped and its Nth record found without scanning.
+JOURNAL_MAGIC = b'OP1J'
+JOURNAL_VERSION = 1
+JOURNAL_RECORD_SIZE = 32
+
+# magic, version, record size, wall clock time recording started
+JOURNAL_HEADER = struct.Struct('<4sBB2xd16x')
+
+# Seconds since recording started, kind and flags, data length, data
+JOURNAL_RECORD = struct.Struct('<dBB22s')
+JOURNAL_RECORD_DATA_SIZE = 22
+
+RECORD_NONSYSEX = 0x00
+RECORD_SYSEX = 0x01
+RECORD_KIND_MASK = 0x0f
+# Set on every record of a message but its last, longer sysex messages
+# span several records
+RECORD_CONTINUED = 0x80
+
+
+class JournalWriter(object):
+    """
+    Appends incoming MIDI messages to a journal file, see `OP1.start_midi_journal`.
+    """
+    def __init__(self, path, clock=monotonic):
+        self._clock = clock
+        self._start = clock()
+        self._record = bytearray(JOURNAL_RECORD_SIZE)
+        self.num_messages = 0
+
+        self._file = open(path, 'wb')
+        header = bytearray(JOURNAL_RECORD_SIZE)
+        JOURNAL_HEADER.pack_into(header, 0, JOURNAL_MAGIC, JOURNAL_VERSION, JOURNAL_RECORD_SIZE, time.time())
+        self._file.write(header)
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def record_nonsysex(self, midi_bytes):
+        self._append(RECORD_NONSYSEX, midi_bytes)
+
+    def record_sysex(self, midi_bytes):
+        self._append(RECORD_SYSEX, midi_bytes)
+
+    def _append(self, kind, midi_bytes):
+        timestamp = self._clock() - self._start
+        length = len(midi_bytes)
+        for offset in range(0, length, JOURNAL_RECORD_DATA_SIZE):
+            chunk = midi_bytes[offset:offset + JOURNAL_RECORD_DATA_SIZE]
+            flags = kind
+            if offset + JOURNAL_RECORD_DATA_SIZE < length:
+                flags |= RECORD_CONTINUED
+            JOURNAL_RECORD.pack_into(self._record, 0, timestamp, flags, len(chunk), bytes(bytearray(chunk)))
+            self._file.write(self._record)
+        self.num_messages += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JournalReader(object):
+    """
+    Memory-maps a journal written by `JournalWriter`.
+
+    Iterating yields `(timestamp, kind, midi_bytes)` per message, with
+    `midi_bytes` a tuple as Live passes to `handle_sysex`/`handle_nonsysex`.
+    A partially written trailing record is ignored.
+    """
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        if mmap is not None:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._buffer = self._file.read()
+
+        if len(self._buffer) < JOURNAL_RECORD_SIZE:
+            self.close()
+            raise ValueError('%s is not a MIDI journal' % path)
+        magic, version, record_size, started_at = JOURNAL_HEADER.unpack_from(self._buffer, 0)
+        if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION or record_size != JOURNAL_RECORD_SIZE:
+            self.close()
+            raise ValueError('%s is not a version %s MIDI journal' % (path, JOURNAL_VERSION))
+
+        # Wall clock time recording started
+        self.started_at = started_at
+
+    def __len__(self):
+        """Number of records, messages longer than a record use several"""
+        return len(self._buffer) // JOURNAL_RECORD_SIZE - 1
+
+    def __iter__(self):
+        buffer = self._buffer
+        message = None
+        for offset in range(JOURNAL_RECORD_SIZE, (len(self) + 1) * JOURNAL_RECORD_SIZE, JOURNAL_RECORD_SIZE):
+            timestamp, flags, length, data = JOURNAL_RECORD.unpack_from(buffer, offset)
+            if message is None:
+                message = bytearray(data[:length])
+            else:
+                message.extend(data[:length])
+            if not flags & RECORD_CONTINUED:
+                yield timestamp, flags & RECORD_KIND_MASK, tuple(message)
+                message = None
+
+    def close(self):
+        if mmap is not None and isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+
+def replay(surface, reader, realtime=False, display_interval=None, clock=monotonic, sleep=time.sleep):
+    """
+    Feeds a journal's messages to a surface.
+
+    Args:
+        surface (OP1): receives every message through `handle_sysex` or
+            `handle_nonsysex`
+        reader (JournalReader): journal to replay
+        realtime (bool): keep the recorded timing, otherwise replay as fast
+            as possible
+        display_interval (float): call `surface.update_display` each time
+            this many recorded seconds pass, as Live would, None never calls it
+    Returns:
+        dict: number of messages and display updates, seconds taken and
+            messages per second
+    """
+    num_messages = 0
+    num_display_updates = 0
+    next_display_update = display_interval
+    start = clock()
+
+    for timestamp, kind, midi_bytes in reader:
+        if realtime:
+            delay = timestamp - (clock() - start)
+            if delay > 0:
+                sleep(delay)
+
+        while next_display_update is not None and timestamp >= next_display_update:
+            surface.update_display()
+            num_display_updates += 1
+            next_display_update += display_interval
+
+        if kind == RECORD_SYSEX:
+            surface.handle_sysex(midi_bytes)
+        else:
+            surface.handle_nonsysex(midi_bytes)
+        num_messages += 1
+
+    seconds = clock() - start
+    return {
+        'messages': num_messages,
+        'display_updates': num_display_updates,
+        'seconds': seconds,
+        'messages_per_second': num_messages / seconds if seconds > 0 else float('inf'),
+    }
@@ -0,0 +1,172 @@
+from functools import partial
+
+from .util import monotonic
+
+LOG_LEVEL_DEBUG = 10
+LOG_LEVEL_INFO = 20
+LOG_LEVEL_WARNING = 30
+LOG_LEVEL_ERROR = 40
+LOG_LEVEL_OFF = 100
+
+LOG_LEVELS_BY_NAME = {
+    'debug': LOG_LEVEL_DEBUG,
+    'info': LOG_LEVEL_INFO,
+    'warning': LOG_LEVEL_WARNING,
+    'error': LOG_LEVEL_ERROR,
+    'off': LOG_LEVEL_OFF,
+}
+
+# Minimum seconds between two messages written from the same call site
+LOG_RATE_LIMIT_INTERVAL = 0.2
+
+# Most records written by one deferred flush
+LOG_FLUSH_BATCH_SIZE = 32
+
+
+def _discard(msg, *args):
+    pass
+
+
+class LogRingBuffer(object):
+    """
+    Fixed-size buffer of unformatted log records, overwriting the oldest
+    record when full.
+
+    Records are `(timestamp, level_name, msg, args)` tuples.
+    """
+    def __init__(self, size):
+        self._records = [None] * size
+        self._start = 0
+        self._count = 0
+        # Records overwritten before they could be flushed
+        self.dropped = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, record):
+        size = len(self._records)
+        end = (self._start + self._count) % size
+        self._records[end] = record
+        if self._count < size:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % size
+            self.dropped += 1
+
+    def pop(self):
+        """Removes and returns the oldest record"""
+        record = self._records[self._start]
+        self._records[self._start] = None
+        self._start = (self._start + 1) % len(self._records)
+        self._count -= 1
+        return record
+
+
+class Logger(object):
+    """
+    Leveled logger writing to Live's Log.txt.
+
+    - `debug`, `info`, `warning` and `error` take a %-format string and
+      its args, formatting only happens when a message is written.
+    - Methods for disabled levels are replaced by a no-op, so with level
+      'off' a log call costs a single empty function call.
+    - Each call site, identified by its format string, writes at most one
+      message per `rate_limit_interval`. The number of suppressed messages
+      is reported with the next one written.
+
+    With a ring buffer size, records are stored unformatted instead of
+    written, without rate limiting, until `flush` is called.
+    """
+    def __init__(self, write, level=LOG_LEVEL_INFO,
+                 rate_limit_interval=LOG_RATE_LIMIT_INTERVAL, clock=monotonic,
+                 ring_buffer_size=0):
+        """
+        Args:
+            write (Callable[[str], None]): e.g. `ControlSurface.log_message`
+            level (int|str): minimum level written
+            ring_buffer_size (int): records to buffer, 0 writes immediately
+        """
+        self._write = write
+        self._rate_limit_interval = rate_limit_interval
+        self._clock = clock
+        self._ring_buffer = LogRingBuffer(ring_buffer_size) if ring_buffer_size else None
+
+        # Format string -> [next allowed timestamp, suppressed count]
+        self._call_sites = {}
+
+        self.level = None
+        self.set_level(level)
+
+    @property
+    def debug_enabled(self):
+        """Guard for building expensive log arguments"""
+        return self.level <= LOG_LEVEL_DEBUG
+
+    def set_level(self, level):
+        if not isinstance(level, int):
+            level = LOG_LEVELS_BY_NAME[level]
+        self.level = level
+
+        for name, method_level in (
+            ('debug', LOG_LEVEL_DEBUG),
+            ('info', LOG_LEVEL_INFO),
+            ('warning', LOG_LEVEL_WARNING),
+            ('error', LOG_LEVEL_ERROR),
+        ):
+            if method_level >= level:
+                setattr(self, name, partial(self._log, name.upper()))
+            else:
+                setattr(self, name, _discard)
+
+    @property
+    def num_buffered(self):
+        return len(self._ring_buffer) if self._ring_buffer is not None else 0
+
+    def flush(self, max_records=None, deadline=None):
+        """
+        Formats and writes buffered records, oldest first.
+
+        Args:
+            max_records (int): most records to write, all if None
+            deadline (float): clock time after which to stop writing
+        """
+        ring_buffer = self._ring_buffer
+        if not ring_buffer:
+            return
+
+        if ring_buffer.dropped:
+            self._write('WARNING %d log records dropped' % ring_buffer.dropped)
+            ring_buffer.dropped = 0
+
+        num_written = 0
+        while ring_buffer:
+            if max_records is not None and num_written >= max_records:
+                break
+            if deadline is not None and self._clock() >= deadline:
+                break
+            timestamp, level_name, msg, args = ring_buffer.pop()
+            text = msg % args if args else msg
+            self._write('%.3f %s %s' % (timestamp, level_name, text))
+            num_written += 1
+
+    def _log(self, level_name, msg, *args):
+        now = self._clock()
+        if self._ring_buffer is not None:
+            self._ring_buffer.append((now, level_name, msg, args))
+            return
+
+        call_site = self._call_sites.get(msg)
+        if call_site is None:
+            call_site = self._call_sites[msg] = [now, 0]
+        elif now < call_site[0]:
+            call_site[1] += 1
+            return
+
+        text = msg % args if args else msg
+        if call_site[1]:
+            text = '%s (%d similar suppressed)' % (text, call_site[1])
+        call_site[0] = now + self._rate_limit_interval
+        call_site[1] = 0
+
+        self._write('%s %s' % (level_name, text))
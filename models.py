@@ -0,0 +1,422 @@
+from functools import partial
+
+from .consts import *
+from .util import LRUCache
+
+# Fields of `SelectedTrackModel` that can be marked dirty
+TRACK_NAME = 'name'
+TRACK_MUTE = 'mute'
+TRACK_SOLO = 'solo'
+TRACK_ARM = 'arm'
+TRACK_CLIPS = 'clips'
+
+TRACK_FIELDS = (TRACK_NAME, TRACK_MUTE, TRACK_SOLO, TRACK_ARM, TRACK_CLIPS)
+
+# Devices whose parameter tables `DeviceParameterIndex` keeps
+DEVICE_PARAMETER_INDEX_SIZE = 32
+
+
+def add_listener(subject, prop, callback):
+    getattr(subject, 'add_%s_listener' % prop)(callback)
+
+
+def remove_listener(subject, prop, callback):
+    # Deleted Live objects compare equal to None
+    if subject != None and getattr(subject, '%s_has_listener' % prop)(callback):
+        getattr(subject, 'remove_%s_listener' % prop)(callback)
+
+
+class ListenerRegistry(object):
+    """
+    Listeners added through the registry, released together by
+    `release_all`.
+
+    The exact subject and callable of every listener are kept, so
+    releasing neither depends on recreating an equal callback nor on what
+    is selected at release time.
+    """
+    def __init__(self):
+        self._subscriptions = []
+
+    def __len__(self):
+        """Number of listeners currently added"""
+        return len(self._subscriptions)
+
+    def add(self, subject, prop, callback):
+        add_listener(subject, prop, callback)
+        self._subscriptions.append((subject, prop, callback))
+
+    def release_all(self):
+        for subject, prop, callback in reversed(self._subscriptions):
+            remove_listener(subject, prop, callback)
+        del self._subscriptions[:]
+
+
+class SelectedTrackModel(object):
+    """
+    Cached state of the selected track, kept current by Live listeners.
+
+    Every field has a revision counter that is bumped when a listener marks
+    it dirty, so views can re-render only what changed and read plain
+    Python values instead of querying the Live API on every tick.
+
+    Only the page of `NUM_DISPLAY_CLIP_SLOTS` clip slots containing the
+    selected scene is observed, so the cost does not grow with set size.
+    """
+    def __init__(self, surface):
+        self._surface = surface
+        self._track = None
+
+        surface.instrumentation.wrap_methods(
+            self,
+            '_on_selected_track_changed',
+            '_on_selected_scene_changed',
+            '_on_name_changed',
+            '_on_mute_changed',
+            '_on_solo_changed',
+            '_on_arm_changed',
+            '_on_clip_slots_changed',
+            '_on_has_clip_changed',
+            '_on_clip_color_changed',
+        )
+
+        # Observed clip slots and their clips, by position in the window
+        self._clip_slots = []
+        self._clips = [None] * NUM_DISPLAY_CLIP_SLOTS
+        self._has_clip_callbacks = [
+            partial(self._on_has_clip_changed, i) for i in range(NUM_DISPLAY_CLIP_SLOTS)
+        ]
+        self._color_callbacks = [
+            partial(self._on_clip_color_changed, i) for i in range(NUM_DISPLAY_CLIP_SLOTS)
+        ]
+
+        self._revisions = {field: 0 for field in TRACK_FIELDS}
+
+        self.name = ''
+        self.mute = False
+        self.solo = False
+        self.arm = False
+
+        # Page of clip slots shown on the display
+        self.window_page = 0
+        self.num_pages = 1
+        # Color of the clip in each clip slot of the window, or None for
+        # empty slots. Shorter than the window on the last page.
+        self.clip_colors = []
+
+        self.song().view.add_selected_track_listener(self._on_selected_track_changed)
+        self.song().view.add_selected_scene_listener(self._on_selected_scene_changed)
+        self._subscribe(self.surface.selected_track)
+
+    @property
+    def surface(self):
+        return self._surface
+
+    @property
+    def track(self):
+        return self._track
+
+    @property
+    def window_start(self):
+        """Scene index of the first clip slot in the window"""
+        return self.window_page * NUM_DISPLAY_CLIP_SLOTS
+
+    def song(self):
+        return self.surface.song()
+
+    def disconnect(self):
+        remove_listener(self.song().view, 'selected_track', self._on_selected_track_changed)
+        remove_listener(self.song().view, 'selected_scene', self._on_selected_scene_changed)
+        self._unsubscribe()
+
+    def revision(self, *fields):
+        """
+        Returns:
+            int: changes whenever any of `fields` is marked dirty
+        """
+        return sum(self._revisions[field] for field in fields)
+
+    def _mark_dirty(self, field):
+        self._revisions[field] += 1
+
+    #
+    # Track subscriptions
+    #
+
+    def _on_selected_track_changed(self):
+        self._unsubscribe()
+        self._subscribe(self.surface.selected_track)
+
+    def _has_mute_and_solo(self, track):
+        return track != self.song().master_track
+
+    def _subscribe(self, track):
+        self._track = track
+
+        add_listener(track, 'name', self._on_name_changed)
+        if self._has_mute_and_solo(track):
+            add_listener(track, 'mute', self._on_mute_changed)
+            add_listener(track, 'solo', self._on_solo_changed)
+        if track.can_be_armed:
+            add_listener(track, 'arm', self._on_arm_changed)
+        add_listener(track, 'clip_slots', self._on_clip_slots_changed)
+
+        self._on_name_changed()
+        self._on_mute_changed()
+        self._on_solo_changed()
+        self._on_arm_changed()
+        self._subscribe_clip_slots()
+
+    def _unsubscribe(self):
+        track = self._track
+        if track is None:
+            return
+
+        self._unsubscribe_clip_slots()
+        remove_listener(track, 'name', self._on_name_changed)
+        remove_listener(track, 'mute', self._on_mute_changed)
+        remove_listener(track, 'solo', self._on_solo_changed)
+        remove_listener(track, 'arm', self._on_arm_changed)
+        remove_listener(track, 'clip_slots', self._on_clip_slots_changed)
+        self._track = None
+
+    def _on_name_changed(self):
+        self.name = self._track.name
+        self._mark_dirty(TRACK_NAME)
+
+    def _on_mute_changed(self):
+        self.mute = self._has_mute_and_solo(self._track) and self._track.mute
+        self._mark_dirty(TRACK_MUTE)
+
+    def _on_solo_changed(self):
+        self.solo = self._has_mute_and_solo(self._track) and self._track.solo
+        self._mark_dirty(TRACK_SOLO)
+
+    def _on_arm_changed(self):
+        self.arm = self._track.can_be_armed and self._track.arm
+        self._mark_dirty(TRACK_ARM)
+
+    #
+    # Clip slot window subscriptions
+    #
+
+    def _on_selected_scene_changed(self):
+        window_page = self.surface.selected_scene_num // NUM_DISPLAY_CLIP_SLOTS
+        if window_page != self.window_page:
+            self._on_clip_slots_changed()
+
+    def _on_clip_slots_changed(self):
+        self._unsubscribe_clip_slots()
+        self._subscribe_clip_slots()
+
+    def _subscribe_clip_slots(self):
+        clip_slots = self._track.clip_slots
+        num_clip_slots = len(clip_slots)
+
+        self.num_pages = max(1, -(-num_clip_slots // NUM_DISPLAY_CLIP_SLOTS))
+        self.window_page = min(
+            self.surface.selected_scene_num // NUM_DISPLAY_CLIP_SLOTS,
+            self.num_pages - 1,
+        )
+
+        window_start = self.window_start
+        window_end = min(window_start + NUM_DISPLAY_CLIP_SLOTS, num_clip_slots)
+        self._clip_slots = [clip_slots[i] for i in range(window_start, window_end)]
+        self.clip_colors = [None] * len(self._clip_slots)
+
+        for i, clip_slot in enumerate(self._clip_slots):
+            add_listener(clip_slot, 'has_clip', self._has_clip_callbacks[i])
+            self._subscribe_clip(i)
+        self._mark_dirty(TRACK_CLIPS)
+
+    def _unsubscribe_clip_slots(self):
+        for i, clip_slot in enumerate(self._clip_slots):
+            self._unsubscribe_clip(i)
+            remove_listener(clip_slot, 'has_clip', self._has_clip_callbacks[i])
+
+        self._clip_slots = []
+        self.clip_colors = []
+
+    def _subscribe_clip(self, slot_num):
+        clip_slot = self._clip_slots[slot_num]
+        if clip_slot is None or not clip_slot.has_clip:
+            return
+
+        clip = clip_slot.clip
+        add_listener(clip, 'color', self._color_callbacks[slot_num])
+        self._clips[slot_num] = clip
+        self.clip_colors[slot_num] = clip.color
+
+    def _unsubscribe_clip(self, slot_num):
+        clip = self._clips[slot_num]
+        if clip is not None:
+            remove_listener(clip, 'color', self._color_callbacks[slot_num])
+        self._clips[slot_num] = None
+        self.clip_colors[slot_num] = None
+
+    def _on_has_clip_changed(self, slot_num):
+        self._unsubscribe_clip(slot_num)
+        self._subscribe_clip(slot_num)
+        self._mark_dirty(TRACK_CLIPS)
+
+    def _on_clip_color_changed(self, slot_num):
+        self.clip_colors[slot_num] = self._clips[slot_num].color
+        self._mark_dirty(TRACK_CLIPS)
+
+
+class DeviceParameterIndex(object):
+    """
+    Parameter name to index and bank tables of devices, built on first use
+    of a device and dropped when its `parameters` change.
+
+    Devices are identified by the pointer of the underlying Live object,
+    as the API wrappers are recreated on every access. Only the
+    DEVICE_PARAMETER_INDEX_SIZE most recently used devices are kept.
+    """
+    def __init__(self, param_names_by_class, on_change=None):
+        """
+        Args:
+            param_names_by_class (Dict[str, List[str]]): parameter names
+                leading the first bank of devices of a class, None for
+                positions left empty
+            on_change (Callable[[Device], None]): called when the
+                parameters of a device looked up before changed, its tables
+                are rebuilt on next use
+        """
+        self._param_names_by_class = param_names_by_class
+        self._on_change = on_change
+        # Device class -> tuple of names, compiled once per class
+        self._compiled_names = {}
+        # Live pointer -> (device, {parameter name: index}, listener,
+        # {bank size: banks})
+        self._entries = LRUCache(DEVICE_PARAMETER_INDEX_SIZE, self._release_entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _entry(self, device):
+        entry = self._entries.get(device._live_ptr)
+        # A deleted device compares equal to None, its pointer may have been
+        # reused by another one
+        if entry is not None and entry[0] == None:
+            self._entries.pop(device._live_ptr)
+            entry = None
+        if entry is None:
+            indices = {}
+            for i, param in enumerate(device.parameters):
+                indices.setdefault(param.name, i)
+            listener = partial(self._invalidate, device._live_ptr)
+            add_listener(device, 'parameters', listener)
+            entry = (device, indices, listener, {})
+            self._entries.set(device._live_ptr, entry)
+        return entry
+
+    def param_names(self, class_name):
+        """
+        Returns:
+            Tuple[str]: names leading the first bank of a device class,
+                empty for classes without any
+        """
+        names = self._compiled_names.get(class_name)
+        if names is None:
+            names = self._compiled_names[class_name] = tuple(
+                self._param_names_by_class.get(class_name, ())
+            )
+        return names
+
+    def indices_by_name(self, device):
+        """
+        Returns:
+            Dict[str, int]: index of the first parameter with each name
+        """
+        return self._entry(device)[1]
+
+    def resolve(self, device, param_names):
+        """
+        Args:
+            param_names (Iterable[str]): None for unmapped positions
+        Returns:
+            List[int]: parameter index for each name, None where the name
+                is None or the device has no such parameter
+        """
+        indices = self.indices_by_name(device)
+        return [indices.get(name) if name is not None else None for name in param_names]
+
+    def banks(self, device, bank_size):
+        """
+        Splits a device's parameters into banks. The first bank starts with
+        the parameters named for its class, all other parameters follow in
+        device order.
+
+        Args:
+            bank_size (int): parameters per bank
+        Returns:
+            List[List[int]]: parameter index for each slot of each bank,
+                None for empty slots
+        """
+        banks_by_size = self._entry(device)[3]
+        banks = banks_by_size.get(bank_size)
+        if banks is None:
+            slots = self.resolve(device, self.param_names(device.class_name))
+            named = set(slots)
+            slots.extend(i for i in range(len(device.parameters)) if i not in named)
+            slots.extend([None] * (-len(slots) % bank_size))
+            banks = [slots[i:i + bank_size] for i in range(0, len(slots), bank_size)]
+            banks = banks_by_size[bank_size] = banks or [[None] * bank_size]
+        return banks
+
+    def _invalidate(self, live_ptr):
+        entry = self._entries.pop(live_ptr)
+        if entry is None:
+            return
+        self._release_entry(live_ptr, entry)
+        if self._on_change is not None:
+            self._on_change(entry[0])
+
+    def _release_entry(self, live_ptr, entry):
+        device, _, listener, _ = entry
+        remove_listener(device, 'parameters', listener)
+
+    def clear(self):
+        for entry in self._entries.values():
+            self._release_entry(None, entry)
+        self._entries.clear()
+
+
+class SelectionIndex(object):
+    """
+    Tracks the index of the selected item in one of the song's lists
+    (e.g. `tracks` with `selected_track`).
+
+    The pointer to index table is only rebuilt when the list changes, and
+    the selected index is refreshed by the selection listener, so reading
+    it is constant time regardless of set size.
+    """
+    def __init__(self, song, list_prop, selected_prop):
+        self._song = song
+        self._list_prop = list_prop
+        self._selected_prop = selected_prop
+
+        self._index_by_ptr = {}
+        self.index = None
+
+        add_listener(song, list_prop, self._on_list_changed)
+        add_listener(song.view, selected_prop, self._on_selection_changed)
+        self._on_list_changed()
+
+    def disconnect(self):
+        remove_listener(self._song, self._list_prop, self._on_list_changed)
+        remove_listener(self._song.view, self._selected_prop, self._on_selection_changed)
+
+    def _on_list_changed(self):
+        # Live API wrappers are recreated on every access, so index by the
+        # pointer of the underlying Live object
+        self._index_by_ptr = {
+            obj._live_ptr: i for i, obj in enumerate(getattr(self._song, self._list_prop))
+        }
+        self._on_selection_changed()
+
+    def _on_selection_changed(self):
+        selected = getattr(self._song.view, self._selected_prop)
+        # Selection may be outside the list, e.g. a return or master track
+        self.index = self._index_by_ptr.get(selected._live_ptr) if selected != None else None
@@ -2,6 +2,13 @@ from functools import partial
 
 from . import ui
 from .consts import *
+from .encoders import EncoderAcceleration
+from .encoders import EncoderDeltaCoalescer
+from .encoders import apply_encoder_delta
+from .encoders import encoder_profile
+from .models import DeviceParameterIndex
+from .models import ListenerRegistry
+from .util import relative_cc_to_delta
 
 DEFAULT_DEVICE_PARAM_MAPPINGS = {
     # Channel EQ
@@ -18,11 +25,63 @@ DEFAULT_DEVICE_PARAM_MAPPINGS = {
 }
 
 
+# Channel strip setters used by TracksMode
+MIXER_STRIP_SETTERS = (
+    'set_volume_control',
+    'set_pan_control',
+    'set_send_controls',
+    'set_mute_button',
+    'set_solo_button',
+    'set_arm_button',
+)
+
+# Surface controls turning device parameters, one bank of parameters.
+# The first 8 follow DEFAULT_DEVICE_PARAM_MAPPINGS.
+DEVICE_ENCODER_NAMES = (
+    '_unshift_encoder_1',
+    '_unshift_encoder_2',
+    '_unshift_encoder_3',
+    '_unshift_encoder_4',
+    '_shift_encoder_1',
+    '_shift_encoder_2',
+    '_shift_encoder_3',
+    '_shift_encoder_4',
+    '_unshift_encoder_u01_1',
+    '_unshift_encoder_u01_2',
+    '_unshift_encoder_u01_3',
+    '_unshift_encoder_u01_4',
+    '_shift_encoder_u01_1',
+    '_shift_encoder_u01_2',
+    '_shift_encoder_u01_3',
+    '_shift_encoder_u01_4',
+    '_unshift_encoder_u02_1',
+    '_unshift_encoder_u02_2',
+    '_unshift_encoder_u02_3',
+    '_unshift_encoder_u02_4',
+    '_shift_encoder_u02_1',
+    '_shift_encoder_u02_2',
+    '_shift_encoder_u02_3',
+    '_shift_encoder_u02_4',
+)
+
+# Shift selects the second layer of parameters, holding an encoder's push
+# button turns it in fine steps instead
+FINE_BUTTON_NAMES = (
+    '_encoder_button_1',
+    '_encoder_button_2',
+    '_encoder_button_3',
+    '_encoder_button_4',
+)
+
+
 class OP1Mode(object):
     def __init__(self, surface, view):
         self._surface = surface
         self._view = view
 
+        # Listeners added while active, released on deactivate
+        self._listeners = ListenerRegistry()
+
     @property
     def surface(self):
         return self._surface
@@ -34,8 +93,14 @@ class OP1Mode(object):
     def song(self):
         return self.surface.song()
 
-    def log_message(self, msg):
-        self.surface.log_message(msg)
+    @property
+    def logger(self):
+        return self.surface.logger
+
+    @property
+    def num_listeners(self):
+        """Listeners currently added by the mode"""
+        return len(self._listeners)
 
     def activate(self):
         with self._surface.component_guard():
@@ -44,6 +109,14 @@ class OP1Mode(object):
     def deactivate(self):
         with self._surface.component_guard():
             self.do_deactivate()
+            self._listeners.release_all()
+
+    def disconnect(self):
+        self._listeners.release_all()
+
+    def update(self):
+        """Called on every display update of the active mode, before rendering"""
+        pass
 
     def do_activate(self):
         raise NotImplementedError()
@@ -58,85 +131,77 @@ class TracksMode(OP1Mode):
             surface=surface,
             view=ui.CurrentTrackInfoView(surface),
         )
+        surface.instrumentation.wrap_methods(self, 'map_mixer_controls_for_current_track')
+
+        # Channel strip setter -> (strip, control) currently assigned
+        self._strip_assignments = {}
 
     def do_activate(self):
-        self.log_message('TracksMode.do_activate')
+        self.logger.debug('TracksMode.do_activate')
+        self.surface._mixer.set_select_buttons(
+            prev_button=self.surface._button_up,
+            next_button=self.surface._button_down,
+        )
         self.map_mixer_controls_for_current_track()
-        self.song().view.add_selected_track_listener(
-            self.map_mixer_controls_for_current_track)
+        self._listeners.add(self.song().view, 'selected_track', self.map_mixer_controls_for_current_track)
 
     def do_deactivate(self):
-        self.log_message('TracksMode.do_deactivate')
+        self.logger.debug('TracksMode.do_deactivate')
         self.unmap_mixer_controls()
-        self.song().view.remove_selected_track_listener(
-            self.map_mixer_controls_for_current_track)
 
     def map_mixer_controls_for_current_track(self):
-        self.log_message('map_mixer_controls_for_current_track()')
-
-        self.unmap_mixer_controls()
-
-        self.surface._mixer.set_select_buttons(
-            prev_button=self.surface._button_up,
-            next_button=self.surface._button_down,
-        )
-
-        # getting selected strip
+        self.logger.debug('map_mixer_controls_for_current_track()')
+
+        # Batches the MIDI map rebuilds requested by the strip setters
+        with self.surface.component_guard():
+            self._set_strip_assignments(self.mixer_assignments_for_current_track())
+
+    def mixer_assignments_for_current_track(self):
+        """
+        Returns:
+            Dict[str, Tuple[ChannelStripComponent, object]]: control to
+                assign through each channel strip setter
+        """
+        # The selected strip follows the selected track
         channel_strip = self.surface._mixer.selected_strip()
 
-        # perform track assignments
-        channel_strip.set_volume_control(self.surface._encoder_1)
-        channel_strip.set_pan_control(self.surface._encoder_2)
-
-        # setting send encoders
-        channel_strip.set_send_controls((
-            self.surface._encoder_3,
-            self.surface._encoder_4,
-        ))
+        assignments = {
+            'set_volume_control': self.surface._encoder_1,
+            'set_pan_control': self.surface._encoder_2,
+            'set_send_controls': (self.surface._encoder_3, self.surface._encoder_4),
+            'set_solo_button': self.surface._button_play,
+        }
 
         # if track is no master, set mute button
         if (channel_strip._track!=self.song().master_track):
-            channel_strip.set_mute_button(self.surface._button_stop)
-
-        # setting solo button
-        channel_strip.set_solo_button(self.surface._button_play)
+            assignments['set_mute_button'] = self.surface._button_stop
 
         # if track can be armed, set arm button
         if (channel_strip._track.can_be_armed):
-            channel_strip.set_arm_button(self.surface._button_record)
-
-    def clear_return_track_assignment(self, strip):
-        # clear return track assingments
-        strip.set_volume_control(None)
-        strip.set_pan_control(None)
-        strip.set_mute_button(None)
-        strip.set_solo_button(None)
-
-    def clear_track_assignment(self, strip):
-        # clear track assignments
-        strip.set_volume_control(None)
-        strip.set_pan_control(None)
-        strip.set_mute_button(None)
-        strip.set_solo_button(None)
-        strip.set_arm_button(None)
+            assignments['set_arm_button'] = self.surface._button_record
+
+        return {setter: (channel_strip, control) for setter, control in assignments.items()}
 
     def unmap_mixer_controls(self):
+        self._set_strip_assignments({})
         self.surface._mixer.set_select_buttons(
             prev_button=None,
             next_button=None,
         )
 
-        # for all normal tracks, clear assignments
-        for i in range(NUM_TRACKS):
-            strip = self.surface._mixer.channel_strip(i)
-            if (strip!=None):
-                self.clear_track_assignment(strip)
-
-        # for all return tracks, clear assignments
-        for i in range(NUM_RETURN_TRACKS):
-            return_strip = self.surface._mixer.return_strip(i)
-            if (return_strip!=None):
-                self.clear_return_track_assignment(return_strip)
+    def _set_strip_assignments(self, assignments):
+        """Only calls the setters of assignments that changed"""
+        current = self._strip_assignments
+        for setter in MIXER_STRIP_SETTERS:
+            assignment = assignments.get(setter)
+            previous = current.get(setter)
+            if assignment == previous:
+                continue
+            if previous is not None:
+                getattr(previous[0], setter)(None)
+            if assignment is not None:
+                getattr(assignment[0], setter)(assignment[1])
+        self._strip_assignments = assignments
 
 
 class EffectsMode(OP1Mode):
@@ -146,99 +211,186 @@ class EffectsMode(OP1Mode):
             view=ui.CurrentTrackEffectsView(surface),
         )
 
-        self._device_encoders = [
-            self.surface._unshift_encoder_1,
-            self.surface._unshift_encoder_2,
-            self.surface._unshift_encoder_3,
-            self.surface._unshift_encoder_4,
-            self.surface._shift_encoder_1,
-            self.surface._shift_encoder_2,
-            self.surface._shift_encoder_3,
-            self.surface._shift_encoder_4,
-        ]
+        # Controls are looked up on first activation, the surface creates
+        # them then
+        self._device_encoders = None
+        self._fine_buttons = None
 
         self._param_mappings = {
-            i: None for i in range(len(self._device_encoders))
+            i: None for i in range(self.num_encoders)
         }
+        # Parameter controlled by each encoder. Encoders aren't mapped in
+        # the MIDI map, turns are accumulated and written once per frame.
+        self._mapped_params = [None] * self.num_encoders
+        clock = surface.scheduler.clock
+        self._encoder_deltas = EncoderDeltaCoalescer(self.num_encoders, clock=clock)
+        self._encoder_acceleration = EncoderAcceleration(self.num_encoders, clock=clock)
+
+        # Banks of parameter indices of the selected device
+        self._banks = [[None] * self.num_encoders]
+        self._bank_num = 0
+
+        # Parameter name lookups of devices shown recently, the banks are
+        # rebuilt when the selected device's parameters change
+        self._param_index = DeviceParameterIndex(
+            DEFAULT_DEVICE_PARAM_MAPPINGS,
+            on_change=self.device_parameters_changed,
+        )
+
+        # Selected device listener of the selected track, moved along with
+        # the track selection
+        self._track_listeners = ListenerRegistry()
+
+        surface.instrumentation.wrap_methods(
+            self,
+            'encoder_value_changed',
+            'selected_track_changed',
+            'selected_device_changed',
+            'on_bank_button',
+        )
+        # Same callables are needed to remove the listeners again
+        self._encoder_listeners = [
+            partial(self.encoder_value_changed, param_num)
+            for param_num in range(self.num_encoders)
+        ]
+        self._prev_bank_listener = partial(self.on_bank_button, -1)
+        self._next_bank_listener = partial(self.on_bank_button, 1)
 
     @property
     def num_encoders(self):
-        return len(self._device_encoders)
+        return len(DEVICE_ENCODER_NAMES)
 
     def do_activate(self):
-        self.log_message('EffectsMode.do_activate')
+        self.logger.debug('EffectsMode.do_activate')
 
-        for param_num, encoder in enumerate(self._device_encoders):
-            encoder.add_value_listener(partial(self.encoder_value_changed, param_num))
+        if self._device_encoders is None:
+            self._device_encoders = [getattr(self.surface, name) for name in DEVICE_ENCODER_NAMES]
+            self._fine_buttons = [
+                getattr(self.surface, name) for name in FINE_BUTTON_NAMES
+            ] * (self.num_encoders // len(FINE_BUTTON_NAMES))
+
+        for encoder, listener in zip(self._device_encoders, self._encoder_listeners):
+            self._listeners.add(encoder, 'value', listener)
 
         # self.song().view.add_selected_chain_listener(self.selected_device_changed)
         # self.song().add_appointed_device_listener(self.selected_device_changed)
-        self.surface.selected_track.view.add_selected_device_listener(self.selected_device_changed)
+        self._listeners.add(self.song().view, 'selected_track', self.selected_track_changed)
+        self._track_listeners.add(self.surface.selected_track.view, 'selected_device', self.selected_device_changed)
+        self._listeners.add(self.surface._button_ss5, 'value', self._prev_bank_listener)
+        self._listeners.add(self.surface._button_ss6, 'value', self._next_bank_listener)
 
         self.reset_param_mappings()
 
     def do_deactivate(self):
-        self.log_message('EffectsMode.do_deactivate')
+        self.logger.debug('EffectsMode.do_deactivate')
+        self._track_listeners.release_all()
 
-        for param_num, encoder in enumerate(self._device_encoders):
-            encoder.remove_value_listener(partial(self.encoder_value_changed, param_num))
+    def disconnect(self):
+        super(EffectsMode, self).disconnect()
+        self._track_listeners.release_all()
+        self._param_index.clear()
 
-        # self.song().remove_appointed_device_listener(self.selected_device_changed)
-        self.surface.selected_track.view.remove_selected_device_listener(self.selected_device_changed)
+    @property
+    def num_listeners(self):
+        return len(self._listeners) + len(self._track_listeners)
 
     def encoder_value_changed(self, encoder_num, value):
-        param_num = self._param_mappings[encoder_num]
-        if param_num is not None:
-            param = self.surface.selected_device.parameters[param_num]
-            self.log_message('%s: %s' % (param.name, value))
-            self.update_displayed_param(param)
+        profile = encoder_profile(
+            self._mapped_params[encoder_num],
+            fine=self._fine_buttons[encoder_num].is_pressed(),
+        )
+        delta = self._encoder_acceleration.scale(encoder_num, relative_cc_to_delta(value), profile)
+        if self._encoder_deltas.add(encoder_num, delta):
+            self.apply_encoder_deltas()
+
+    def update(self):
+        self._encoder_acceleration.tick()
+        self.apply_encoder_deltas()
+
+    def apply_encoder_deltas(self):
+        encoder_num = self._encoder_deltas.flush(self._apply_encoder_delta)
+        if encoder_num is not None and self._mapped_params[encoder_num] is not None:
+            self.update_displayed_param(self._mapped_params[encoder_num])
+
+    def _apply_encoder_delta(self, encoder_num, delta):
+        param = self._mapped_params[encoder_num]
+        if param is not None:
+            # Reading the name is a Live API call, skipped unless logged
+            if self.logger.debug_enabled:
+                self.logger.debug('%s: %+.1f', param.name, delta)
+            apply_encoder_delta(param, delta)
         else:
-            self.log_message('Encoder %s: %s' % (encoder_num, value))
+            self.logger.debug('Encoder %s: %+.1f', encoder_num, delta)
 
     def update_displayed_param(self, param):
         self.view.set_displayed_device_param(param)
 
     def reset_param_mappings(self):
-        for i in range(self.num_encoders):
-            self._param_mappings[i] = None
-
         device = self.surface.selected_device
         if device is None:
-            self.view.set_displayed_device_param(None)
-            return
-
-        self.log_message('Device class: %s' % device.class_name)
-        for param in device.parameters:
-            self.log_message('- %s' % param.name)
-
-        params = device.parameters
-        if device.class_name in DEFAULT_DEVICE_PARAM_MAPPINGS:
-            mappings = DEFAULT_DEVICE_PARAM_MAPPINGS[device.class_name]
-            for encoder_num, param_name in enumerate(mappings):
-                self.log_message('mapping encoder %s to param %s' % (encoder_num, param_name))
-                # No param mapped
-                if param_name is None:
-                    continue
+            self._banks = [[None] * self.num_encoders]
+        else:
+            if self.logger.debug_enabled:
+                self.logger.debug('Device class: %s', device.class_name)
+                for param in device.parameters:
+                    self.logger.debug('- %s', param.name)
 
-                encoder = self._device_encoders[encoder_num]
-                param_num, param = next((i,p) for i,p in enumerate(params) if p.name == param_name)
+            # Devices without default mappings start with their first params
+            self._banks = self._param_index.banks(device, self.num_encoders)
 
-                self._param_mappings[encoder_num] = param_num
-                encoder.connect_to(param)
-        else:
-            # Map first N encoders to first N params
-            for encoder_num in range(min(len(params), self.num_encoders)):
-                encoder = self._device_encoders[encoder_num]
-                param = params[encoder_num]
+        self._bank_num = 0
+        self.map_bank()
 
-                self._param_mappings[encoder_num] = encoder_num
-                encoder.connect_to(param)
+    def map_bank(self):
+        """
+        Points the encoders at the parameters of the current bank. Encoders
+        aren't part of the MIDI map, so no rebuild is needed.
+        """
+        # Turns not yet written were meant for the previous parameters
+        self._encoder_deltas.clear()
 
-        first_param_num = self._param_mappings[0]
-        self.view.set_displayed_device_param(params[first_param_num] if params else None)
+        device = self.surface.selected_device
+        params = device.parameters if device is not None else ()
+
+        displayed_param = None
+        num_params = len(params)
+        for encoder_num, param_num in enumerate(self._banks[self._bank_num]):
+            # No param mapped, the device has no param of that name, or its
+            # params shrank before the banks were rebuilt
+            param = params[param_num] if param_num is not None and param_num < num_params else None
+            self._param_mappings[encoder_num] = param_num
+            self._mapped_params[encoder_num] = param
+            if displayed_param is None:
+                displayed_param = param
+
+        self.view.set_bank(self._bank_num, len(self._banks))
+        self.view.set_displayed_device_param(displayed_param)
+
+    def on_bank_button(self, direction, value):
+        if value != BUTTON_ON:
+            return
+        bank_num = max(0, min(self._bank_num + direction, len(self._banks) - 1))
+        if bank_num != self._bank_num:
+            self._bank_num = bank_num
+            self.map_bank()
+
+    def selected_track_changed(self):
+        self._track_listeners.release_all()
+        self._track_listeners.add(self.surface.selected_track.view, 'selected_device', self.selected_device_changed)
+        self.reset_param_mappings()
 
     def selected_device_changed(self):
-        self.log_message('Selected device changed')
+        self.logger.debug('Selected device changed')
         self.reset_param_mappings()
 
+    def device_parameters_changed(self, device):
+        # Other devices' banks are rebuilt when next selected, and all of
+        # them on activation
+        if self.surface.current_mode is not self:
+            return
+        selected_device = self.surface.selected_device
+        if selected_device is not None and selected_device._live_ptr == device._live_ptr:
+            self.logger.debug('Selected device parameters changed')
+            self.reset_param_mappings()
+
 
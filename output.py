@@ -0,0 +1,126 @@
+from collections import deque
+
+from .consts import *
+from .util import monotonic
+
+# Priority classes, lowest value sent first
+OUTPUT_PRIORITY_HANDSHAKE = 0
+OUTPUT_PRIORITY_FEEDBACK = 1
+OUTPUT_PRIORITY_DISPLAY = 2
+
+OUTPUT_PRIORITIES = (OUTPUT_PRIORITY_HANDSHAKE, OUTPUT_PRIORITY_FEEDBACK, OUTPUT_PRIORITY_DISPLAY)
+
+
+class MidiOutputQueue(object):
+    """
+    Orders and rate limits everything sent to the OP-1.
+
+    - Handshake messages are sent immediately, ahead of anything queued.
+    - Feedback and display messages are queued, and `flush` sends them in
+      priority order within a bytes per second budget (a token bucket
+      holding up to `burst_bytes`).
+    - Messages sent with a key replace a queued message with the same key,
+      so a display frame superseded before it went out is never sent.
+    """
+    def __init__(self, send_midi, bytes_per_second=MIDI_OUTPUT_BYTES_PER_SECOND,
+                 burst_bytes=MIDI_OUTPUT_BURST_BYTES, clock=monotonic):
+        """
+        Args:
+            send_midi (Callable[[tuple], None]): writes a message to the port
+        """
+        self._send_midi = send_midi
+        self._bytes_per_second = bytes_per_second
+        self._burst_bytes = burst_bytes
+        self._clock = clock
+
+        self._tokens = float(burst_bytes)
+        self._last_refill = clock()
+
+        # Queued [midi_bytes, key] entries per priority, keyed entries
+        # are also found by key to be replaced in place
+        self._queues = [deque() for _ in OUTPUT_PRIORITIES]
+        self._entries_by_key = {}
+
+        # Bytes queued and not yet sent
+        self.pending_bytes = 0
+        self.sent_bytes = 0
+
+    def send(self, midi_bytes, priority=OUTPUT_PRIORITY_FEEDBACK, key=None):
+        """
+        Args:
+            midi_bytes (tuple): complete message
+            key (object): identifies messages superseding each other, e.g.
+                a display channel
+        """
+        if priority == OUTPUT_PRIORITY_HANDSHAKE:
+            self._refill()
+            self._write(midi_bytes)
+            return
+
+        if key is not None:
+            entry = self._entries_by_key.get(key)
+            if entry is not None:
+                self.pending_bytes += len(midi_bytes) - len(entry[0])
+                entry[0] = midi_bytes
+                return
+
+        entry = [midi_bytes, key]
+        self._queues[priority].append(entry)
+        if key is not None:
+            self._entries_by_key[key] = entry
+        self.pending_bytes += len(midi_bytes)
+
+    def pending(self, priority):
+        """Number of messages queued with `priority`"""
+        return len(self._queues[priority])
+
+    def flush(self):
+        """
+        Sends queued messages, highest priority first, while the budget
+        allows. A message larger than the whole bucket goes out once the
+        bucket is full.
+
+        Returns:
+            int: number of messages sent
+        """
+        self._refill()
+        num_sent = 0
+        for queue in self._queues:
+            while queue:
+                entry = queue[0]
+                size = len(entry[0])
+                if size > self._tokens and self._tokens < self._burst_bytes:
+                    return num_sent
+                queue.popleft()
+                if entry[1] is not None:
+                    del self._entries_by_key[entry[1]]
+                self.pending_bytes -= size
+                self._write(entry[0])
+                num_sent += 1
+        return num_sent
+
+    def clear(self, priority=None):
+        """Drops queued messages, of one priority or all"""
+        for queue_priority, queue in enumerate(self._queues):
+            if priority is not None and queue_priority != priority:
+                continue
+            for midi_bytes, key in queue:
+                self.pending_bytes -= len(midi_bytes)
+                if key is not None:
+                    del self._entries_by_key[key]
+            queue.clear()
+
+    def _refill(self):
+        now = self._clock()
+        # A clock stepping back adds nothing rather than draining the bucket
+        elapsed = max(0.0, now - self._last_refill)
+        self._tokens = min(
+            self._burst_bytes,
+            self._tokens + elapsed * self._bytes_per_second,
+        )
+        self._last_refill = now
+
+    def _write(self, midi_bytes):
+        self._tokens -= len(midi_bytes)
+        self.sent_bytes += len(midi_bytes)
+        self._send_midi(midi_bytes)
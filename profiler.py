@@ -0,0 +1,60 @@
+import os
+import time
+
+try:
+    import cProfile
+except ImportError:
+    # Not shipped with every Live build, profiling is then unavailable
+    cProfile = None
+
+
+class ProfilerSession(object):
+    """
+    Starts and stops `cProfile` inside the running script, see
+    `OP1.toggle_profiler`.
+
+    Live calls into the script from a single thread, so everything the
+    script does between `start` and `stop` is profiled. Stats are written
+    in `pstats` format, e.g. for `python -m pstats <file>` or snakeviz.
+    """
+    def __init__(self, directory):
+        self._directory = directory
+        self._profile = None
+        self._tag = None
+
+    @property
+    def available(self):
+        return cProfile is not None
+
+    @property
+    def running(self):
+        return self._profile is not None
+
+    def start(self, tag):
+        """
+        Args:
+            tag (str): added to the stats file name, e.g. mode and set size
+        """
+        if not self.available or self.running:
+            return
+        self._tag = tag
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self):
+        """
+        Returns:
+            str|None: path stats were written to
+        """
+        if not self.running:
+            return None
+        profile = self._profile
+        profile.disable()
+        self._profile = None
+
+        path = os.path.join(self._directory, 'op1-profile-%s-%s.prof' % (
+            self._tag,
+            time.strftime('%Y%m%d-%H%M%S'),
+        ))
+        profile.dump_stats(path)
+        return path
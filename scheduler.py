@@ -0,0 +1,134 @@
+from heapq import heappop
+from heapq import heappush
+from itertools import count
+
+from .util import monotonic
+
+
+class VirtualClock(object):
+    """
+    Stands in for `monotonic` where time should only move when told to,
+    e.g. to run a surface deterministically in tests and benchmarks.
+    """
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class ScheduledTask(object):
+    def __init__(self, deadline, interval, callback, args):
+        self.deadline = deadline
+        # Seconds between runs, None for one-shot tasks
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+
+class Scheduler(object):
+    """
+    Runs one-shot and periodic tasks from `run_due`, which the surface
+    calls on every display update, so tasks run up to one update late.
+
+    Periodic tasks that fell behind run once and then keep their interval
+    from that run, instead of catching up on every missed run.
+    """
+    def __init__(self, clock=monotonic):
+        """
+        Args:
+            clock (Callable[[], float]): seconds from an arbitrary point,
+                shared with everything else timed by the surface
+        """
+        self.clock = clock
+        self._last_now = clock()
+        # (deadline, sequence, task), cancelled tasks are dropped when due
+        self._heap = []
+        self._sequence = count()
+
+    def now(self):
+        now = self.clock()
+        step = now - self._last_now
+        if step < 0:
+            # The clock stepped back, count it as no time passing. Moving
+            # every deadline by the same step keeps the heap ordered.
+            for task in set(entry[2] for entry in self._heap):
+                task.deadline += step
+            self._heap = [(deadline + step, sequence, task) for deadline, sequence, task in self._heap]
+        self._last_now = now
+        return now
+
+    def call_later(self, delay, callback, *args):
+        """
+        Returns:
+            ScheduledTask: pass to `cancel` to stop it running
+        """
+        return self._push(ScheduledTask(self.now() + delay, None, callback, args))
+
+    def call_every(self, interval, callback, *args):
+        """
+        Runs `callback` every `interval` seconds, first after one interval.
+
+        Returns:
+            ScheduledTask: pass to `cancel` to stop it running
+        """
+        return self._push(ScheduledTask(self.now() + interval, interval, callback, args))
+
+    def cancel(self, task):
+        """
+        Args:
+            task (ScheduledTask|None): ignored if None or no longer active
+        """
+        if task is not None:
+            task.active = False
+
+    def cancel_all(self):
+        for _, _, task in self._heap:
+            task.active = False
+        self._heap = []
+
+    def run_due(self):
+        """
+        Returns:
+            int: number of tasks run
+        """
+        now = self.now()
+        heap = self._heap
+        num_run = 0
+        while heap and heap[0][0] <= now:
+            task = heappop(heap)[2]
+            if not task.active:
+                continue
+
+            if task.interval is None:
+                task.active = False
+            else:
+                task.deadline += task.interval
+                if task.deadline <= now:
+                    task.deadline = now + task.interval
+                self._push(task)
+
+            task.callback(*task.args)
+            num_run += 1
+        return num_run
+
+    def next_deadline(self):
+        """
+        Returns:
+            float|None: when the next active task is due
+        """
+        heap = self._heap
+        while heap and not heap[0][2].active:
+            heappop(heap)
+        return heap[0][0] if heap else None
+
+    def __len__(self):
+        return sum(1 for _, _, task in self._heap if task.active)
+
+    def _push(self, task):
+        heappush(self._heap, (task.deadline, next(self._sequence), task))
+        return task
@@ -0,0 +1,190 @@
+"""
+OP-1 handshake and keepalive, run with `make test`.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import harness
+
+connection = harness.load_surface_module('connection')
+consts = harness.load_surface_module('consts')
+log = harness.load_surface_module('log')
+scheduler = harness.load_surface_module('scheduler')
+
+IDENTITY = connection.parse_identity_reply(harness.OP1_IDENTITY_REPLY)
+
+
+class ParseIdentityReplyTest(unittest.TestCase):
+    def test_valid_reply(self):
+        self.assertEqual(IDENTITY, (128, 0, (0, 0, 0, 0)))
+
+    def test_short_reply(self):
+        reply = harness.OP1_IDENTITY_REPLY[:12] + (0xf7,)
+        self.assertIsNone(connection.parse_identity_reply(reply))
+
+    def test_unterminated_reply(self):
+        reply = harness.OP1_IDENTITY_REPLY[:-1] + (0x00,)
+        self.assertIsNone(connection.parse_identity_reply(reply))
+
+    def test_wrong_manufacturer(self):
+        reply = list(harness.OP1_IDENTITY_REPLY)
+        reply[5:8] = [0x00, 0x20, 0x29]
+        self.assertIsNone(connection.parse_identity_reply(tuple(reply)))
+
+    def test_not_an_identity_reply(self):
+        reply = list(harness.OP1_IDENTITY_REPLY)
+        reply[4] = 0x01
+        self.assertIsNone(connection.parse_identity_reply(tuple(reply)))
+
+    def test_data_byte_out_of_range(self):
+        reply = list(harness.OP1_IDENTITY_REPLY)
+        reply[12] = 0x80
+        self.assertIsNone(connection.parse_identity_reply(tuple(reply)))
+
+
+class DeviceConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = scheduler.VirtualClock(100.0)
+        self.scheduler = scheduler.Scheduler(self.clock)
+        self.num_probes = 0
+        self.num_connected = 0
+        self.num_lost = 0
+        self.connection = self.make_connection(rand=lambda: 0.5)
+
+    def make_connection(self, rand):
+        def send_probe():
+            self.num_probes += 1
+
+        def on_connected():
+            self.num_connected += 1
+
+        def on_lost():
+            self.num_lost += 1
+
+        logger = log.Logger(lambda message: None, level='off')
+        return connection.DeviceConnection(self.scheduler, send_probe, on_connected, on_lost, logger, rand)
+
+    def advance(self, seconds):
+        self.clock.advance(seconds)
+        self.scheduler.run_due()
+
+    def connect(self):
+        self.connection.start()
+        self.connection.handle_identity_reply(IDENTITY)
+        self.num_probes = 0
+
+    def test_start_probes_until_answered(self):
+        self.assertEqual(self.connection.state, connection.CONNECTION_IDLE)
+        self.connection.start()
+        self.assertEqual(self.connection.state, connection.CONNECTION_PROBING)
+        self.assertEqual(self.num_probes, 1)
+
+        self.advance(consts.CONNECTION_RETRY_DELAY)
+        self.assertEqual(self.num_probes, 2)
+
+        self.connection.handle_identity_reply(IDENTITY)
+        self.assertEqual(self.connection.state, connection.CONNECTION_CONNECTED)
+        self.assertEqual(self.connection.identity, IDENTITY)
+        self.assertEqual(self.num_connected, 1)
+
+    def test_backoff_stops_doubling(self):
+        delays = [self.connection.retry_delay(attempt) for attempt in range(8)]
+        max_delay = consts.CONNECTION_RETRY_DELAY * 2 ** consts.CONNECTION_BACKOFF_DOUBLINGS
+        self.assertEqual(delays[:consts.CONNECTION_BACKOFF_DOUBLINGS + 1], [
+            consts.CONNECTION_RETRY_DELAY * 2 ** attempt
+            for attempt in range(consts.CONNECTION_BACKOFF_DOUBLINGS + 1)
+        ])
+        self.assertEqual(delays[consts.CONNECTION_BACKOFF_DOUBLINGS:], [max_delay] * (
+            8 - consts.CONNECTION_BACKOFF_DOUBLINGS))
+
+    def test_retries_never_stop(self):
+        self.connection.start()
+        for attempt in range(10):
+            self.advance(self.connection.retry_delay(attempt))
+        self.assertEqual(self.num_probes, 11)
+        self.assertEqual(self.connection.state, connection.CONNECTION_PROBING)
+
+    def test_retry_jitter(self):
+        jitter = consts.CONNECTION_RETRY_JITTER * consts.CONNECTION_RETRY_DELAY
+        shortest = self.make_connection(rand=lambda: 0.0)
+        longest = self.make_connection(rand=lambda: 1.0)
+        self.assertAlmostEqual(shortest.retry_delay(0), consts.CONNECTION_RETRY_DELAY - jitter)
+        self.assertAlmostEqual(longest.retry_delay(0), consts.CONNECTION_RETRY_DELAY + jitter)
+
+    def test_connected_sends_keepalives(self):
+        self.connect()
+        self.advance(consts.CONNECTION_KEEPALIVE_INTERVAL)
+        self.assertEqual(self.num_probes, 1)
+        self.connection.handle_identity_reply(IDENTITY)
+        self.advance(consts.CONNECTION_KEEPALIVE_INTERVAL)
+        self.assertEqual(self.num_probes, 2)
+        self.assertEqual(self.connection.state, connection.CONNECTION_CONNECTED)
+
+    def test_slow_replies_degrade_and_recover(self):
+        self.connect()
+        self.advance(consts.CONNECTION_KEEPALIVE_INTERVAL)
+        self.clock.advance(2 * consts.CONNECTION_DEGRADED_RTT)
+        self.connection.handle_identity_reply(IDENTITY)
+        self.assertEqual(self.connection.state, connection.CONNECTION_DEGRADED)
+        self.assertAlmostEqual(self.connection.rtt, 2 * consts.CONNECTION_DEGRADED_RTT)
+
+        for _ in range(5):
+            self.advance(consts.CONNECTION_KEEPALIVE_INTERVAL)
+            self.connection.handle_identity_reply(IDENTITY)
+        self.assertEqual(self.connection.state, connection.CONNECTION_CONNECTED)
+        self.assertLess(self.connection.rtt, consts.CONNECTION_DEGRADED_RTT)
+
+    def test_missed_probe_degrades(self):
+        self.connect()
+        self.advance(consts.CONNECTION_KEEPALIVE_INTERVAL)
+        self.advance(consts.CONNECTION_KEEPALIVE_INTERVAL)
+        self.assertEqual(self.connection.state, connection.CONNECTION_DEGRADED)
+        self.assertTrue(self.connection.connected)
+
+        self.connection.handle_identity_reply(IDENTITY)
+        self.assertEqual(self.connection.state, connection.CONNECTION_CONNECTED)
+
+    def test_missed_probes_lose_and_reconnect(self):
+        self.connect()
+        for _ in range(consts.CONNECTION_MAX_MISSED_PROBES + 1):
+            self.advance(consts.CONNECTION_KEEPALIVE_INTERVAL)
+        self.assertEqual(self.num_lost, 1)
+        self.assertEqual(self.connection.state, connection.CONNECTION_PROBING)
+        self.assertFalse(self.connection.connected)
+        self.assertIsNone(self.connection.rtt)
+
+        self.connection.handle_identity_reply(IDENTITY)
+        self.assertEqual(self.connection.state, connection.CONNECTION_CONNECTED)
+        self.assertEqual(self.num_connected, 2)
+
+    def test_unrequested_reply_is_ignored(self):
+        self.connect()
+        self.connection.handle_identity_reply(IDENTITY)
+        self.assertEqual(self.connection.state, connection.CONNECTION_CONNECTED)
+        self.assertIsNone(self.connection.rtt)
+        self.assertEqual(self.num_connected, 1)
+
+    def test_reset_stops_requests(self):
+        self.connect()
+        self.connection.reset()
+        self.advance(10 * consts.CONNECTION_KEEPALIVE_INTERVAL)
+        self.assertEqual(self.num_probes, 0)
+        self.assertEqual(self.connection.state, connection.CONNECTION_IDLE)
+        self.assertEqual(len(self.scheduler), 0)
+
+
+class SurfaceConnectionTest(unittest.TestCase):
+    def test_surface_connects_to_answering_device(self):
+        clock = scheduler.VirtualClock(100.0)
+        surface = harness.create_surface(clock=clock)
+        self.assertFalse(surface.device_connected)
+        harness.connect(surface)
+        self.assertTrue(surface.device_connected)
+        surface.disconnect()
+        self.assertFalse(surface.device_connected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Encoder acceleration, run with `make test`.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import harness
+
+consts = harness.load_surface_module('consts')
+encoders = harness.load_surface_module('encoders')
+scheduler = harness.load_surface_module('scheduler')
+
+# Seconds between display updates
+TICK = 0.06
+
+
+class EncoderAccelerationTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = scheduler.VirtualClock(100.0)
+        self.acceleration = encoders.EncoderAcceleration(1, clock=self.clock)
+        self.acceleration.tick()
+
+    def turn(self, delta, num_ccs):
+        """Turns by `num_ccs` CCs delivered together, then ends the tick"""
+        steps = sum(self.acceleration.scale(0, delta) for _ in range(num_ccs))
+        self.clock.advance(TICK)
+        self.acceleration.tick()
+        return steps
+
+    def test_ccs_at_same_timestamp_are_not_accelerated(self):
+        self.assertEqual(self.turn(1, 5), 5)
+
+    def test_sustained_fast_turn_is_accelerated(self):
+        # 200 steps per second
+        steps = [self.turn(1, 12) for _ in range(10)]
+        self.assertEqual(steps[0], 12)
+        self.assertEqual(steps[-1], 120)
+
+    def test_slow_turn_is_not_accelerated(self):
+        # 17 steps per second
+        steps = [self.turn(1, 1) for _ in range(20)]
+        self.assertEqual(steps, [1] * 20)
+
+    def test_reversing_direction_restarts_unaccelerated(self):
+        for _ in range(10):
+            self.turn(1, 12)
+        self.assertEqual(self.turn(-1, 3), -3)
+
+    def test_rate_settles_after_stopping(self):
+        for _ in range(10):
+            self.turn(1, 12)
+        self.clock.advance(2.0)
+        self.acceleration.tick()
+        self.assertEqual(self.acceleration.rate(0), 0)
+        self.assertEqual(self.turn(1, 5), 5)
+
+    def test_fine_profile_is_not_accelerated(self):
+        for _ in range(10):
+            self.turn(1, 12)
+        fine_step = consts.ENCODER_STEPS_PER_RANGE / float(consts.ENCODER_FINE_STEPS_PER_RANGE)
+        self.assertAlmostEqual(self.acceleration.scale(0, 1, encoders.ENCODER_PROFILE_FINE), fine_step)
+
+
+class EffectsModeEncoderTest(unittest.TestCase):
+    def test_ccs_in_one_batch_move_parameter_one_step_each(self):
+        clock = scheduler.VirtualClock(100.0)
+        surface = harness.create_surface(clock=clock)
+        harness.connect(surface)
+        harness.send_cc(surface, consts.OP1_MODE_2_BUTTON, consts.BUTTON_ON)
+        clock.advance(TICK)
+        surface.update_display()
+
+        param = surface.effects_mode._mapped_params[0]
+        value = param.value
+        for _ in range(5):
+            harness.send_cc(surface, consts.OP1_ENCODER_1, 1)
+        clock.advance(TICK)
+        surface.update_display()
+
+        step = (param.max - param.min) / float(consts.ENCODER_STEPS_PER_RANGE)
+        self.assertAlmostEqual(param.value - value, 5 * step)
+        surface.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
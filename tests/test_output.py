@@ -0,0 +1,105 @@
+"""
+MIDI output ordering and rate limiting, run with `make test`.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import harness
+
+output = harness.load_surface_module('output')
+scheduler = harness.load_surface_module('scheduler')
+
+BYTES_PER_SECOND = 1000
+BURST_BYTES = 100
+
+
+def message(tag, size):
+    return (0xf0, tag) + (0,) * (size - 3) + (0xf7,)
+
+
+class MidiOutputQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = scheduler.VirtualClock(100.0)
+        self.sent = []
+        self.queue = output.MidiOutputQueue(
+            self.sent.append, BYTES_PER_SECOND, BURST_BYTES, clock=self.clock)
+
+    def sent_tags(self):
+        return [midi_bytes[1] for midi_bytes in self.sent]
+
+    def test_handshake_is_sent_immediately(self):
+        self.queue.send(message(1, 10), output.OUTPUT_PRIORITY_DISPLAY)
+        self.queue.send(message(2, 10), output.OUTPUT_PRIORITY_HANDSHAKE)
+        self.assertEqual(self.sent_tags(), [2])
+        self.queue.flush()
+        self.assertEqual(self.sent_tags(), [2, 1])
+
+    def test_flush_sends_highest_priority_first(self):
+        self.queue.send(message(1, 10), output.OUTPUT_PRIORITY_DISPLAY)
+        self.queue.send(message(2, 10), output.OUTPUT_PRIORITY_FEEDBACK)
+        self.queue.send(message(3, 10), output.OUTPUT_PRIORITY_DISPLAY)
+        self.queue.send(message(4, 10), output.OUTPUT_PRIORITY_FEEDBACK)
+        self.assertEqual(self.queue.flush(), 4)
+        self.assertEqual(self.sent_tags(), [2, 4, 1, 3])
+        self.assertEqual(self.queue.pending_bytes, 0)
+        self.assertEqual(self.queue.sent_bytes, 40)
+
+    def test_keyed_message_replaces_queued_one(self):
+        self.queue.send(message(1, 10), output.OUTPUT_PRIORITY_DISPLAY, key=0)
+        self.queue.send(message(2, 10), output.OUTPUT_PRIORITY_DISPLAY, key=1)
+        self.queue.send(message(3, 20), output.OUTPUT_PRIORITY_DISPLAY, key=0)
+        self.assertEqual(self.queue.pending(output.OUTPUT_PRIORITY_DISPLAY), 2)
+        self.assertEqual(self.queue.pending_bytes, 30)
+        self.queue.flush()
+        self.assertEqual(self.sent_tags(), [3, 2])
+
+    def test_budget_limits_flush(self):
+        for tag in range(3):
+            self.queue.send(message(tag, 60), output.OUTPUT_PRIORITY_DISPLAY)
+        self.assertEqual(self.queue.flush(), 1)
+        self.assertEqual(self.queue.pending_bytes, 120)
+
+        # 20 bytes short of the next message
+        self.clock.advance(0.001)
+        self.assertEqual(self.queue.flush(), 0)
+        self.clock.advance(0.02)
+        self.assertEqual(self.queue.flush(), 1)
+        self.assertEqual(self.sent_tags(), [0, 1])
+
+    def test_refill_is_capped_at_burst(self):
+        self.clock.advance(10.0)
+        for tag in range(3):
+            self.queue.send(message(tag, 40), output.OUTPUT_PRIORITY_DISPLAY)
+        self.assertEqual(self.queue.flush(), 2)
+
+    def test_message_larger_than_bucket_is_sent_when_full(self):
+        self.queue.send(message(1, 10), output.OUTPUT_PRIORITY_FEEDBACK)
+        self.queue.send(message(2, 150), output.OUTPUT_PRIORITY_DISPLAY)
+        self.assertEqual(self.queue.flush(), 1)
+        self.clock.advance(0.005)
+        self.assertEqual(self.queue.flush(), 0)
+        self.clock.advance(0.01)
+        self.assertEqual(self.queue.flush(), 1)
+        self.assertEqual(self.sent_tags(), [1, 2])
+
+    def test_clock_step_back_does_not_drain_budget(self):
+        self.clock.advance(-3600.0)
+        self.queue.send(message(1, 60), output.OUTPUT_PRIORITY_DISPLAY)
+        self.assertEqual(self.queue.flush(), 1)
+
+    def test_clear_one_priority(self):
+        self.queue.send(message(1, 10), output.OUTPUT_PRIORITY_FEEDBACK)
+        self.queue.send(message(2, 10), output.OUTPUT_PRIORITY_DISPLAY, key=0)
+        self.queue.clear(output.OUTPUT_PRIORITY_DISPLAY)
+        self.assertEqual(self.queue.pending_bytes, 10)
+
+        # The key no longer refers to the dropped message
+        self.queue.send(message(3, 10), output.OUTPUT_PRIORITY_DISPLAY, key=0)
+        self.queue.flush()
+        self.assertEqual(self.sent_tags(), [1, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
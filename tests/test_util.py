@@ -0,0 +1,56 @@
+"""
+Clock fallback, run with `make test`.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import harness
+
+util = harness.load_surface_module('util')
+
+
+class FakeTime(object):
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SteadyClockTest(unittest.TestCase):
+    def setUp(self):
+        self.time = FakeTime()
+        self.clock = util.steady_clock(self.time)
+
+    def test_follows_wall_clock(self):
+        start = self.clock()
+        self.time.now += 2.5
+        self.assertAlmostEqual(self.clock() - start, 2.5)
+
+    def test_keeps_moving_after_step_back(self):
+        self.time.now += 1.0
+        before_step = self.clock()
+
+        # NTP or DST step of an hour back
+        self.time.now -= 3600.0
+        at_step = self.clock()
+        self.assertEqual(at_step, before_step)
+
+        values = []
+        for _ in range(5):
+            self.time.now += 0.1
+            values.append(self.clock())
+        self.assertGreater(values[0], at_step)
+        self.assertEqual(values, sorted(set(values)))
+        self.assertAlmostEqual(values[-1] - at_step, 0.5)
+
+    def test_forward_step_is_kept(self):
+        start = self.clock()
+        self.time.now += 60.0
+        self.assertAlmostEqual(self.clock() - start, 60.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
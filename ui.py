@@ -1,11 +1,21 @@
-import time
+try:
+    import unicodedata
+except ImportError:
+    # Not shipped with every Live build, accents are then folded to '?'
+    unicodedata = None
 
 from .consts import *
+from .governor import BlinkPhase
+from .models import TRACK_ARM
+from .models import TRACK_MUTE
+from .models import TRACK_NAME
+from .models import TRACK_SOLO
+from .util import LRUCache
 from .util import color_to_bytes
 
 
-COLOR_BLACK_BYTES = [0x00, 0x00, 0x00]
-COLOR_WHITE_BYTES = [0x7F, 0x7F, 0x7F]
+COLOR_BLACK_BYTES = (0x00, 0x00, 0x00)
+COLOR_WHITE_BYTES = (0x7F, 0x7F, 0x7F)
 
 # Used to indicate an update to the display text on screen
 TEXT_START_SEQUENCE = (0xf0, 0x0, 0x20, 0x76, 0x00, 0x03)
@@ -14,6 +24,172 @@ TEXT_COLOR_START_SEQUENCE = (0xf0, 0x0, 0x20, 0x76, 0x00, 0x04)
 # Signals the end of a display update
 TEXT_END_SEQUENCE = (0xf7,)
 
+# Seconds the clip page indicator is shown after changing page
+PAGE_INDICATOR_DURATION = 1.0
+
+# The text length is sent as a single 7-bit byte, each line gets half of it
+DISPLAY_LINE_MAX_LENGTH = 63
+# Line separator and replacement for characters the OP-1 can't show
+DISPLAY_LINE_SEPARATOR = 0x0d
+DISPLAY_UNKNOWN_CHAR = 0x3f
+
+# Number of (top, bottom) text pairs remembered by `DisplayTextEncoder`
+TEXT_ENCODER_CACHE_SIZE = 32
+
+# Display channels tracked by `DisplayFrameDiffer`
+DISPLAY_TEXT_CHANNEL = 'text'
+DISPLAY_COLOR_CHANNEL = 'color'
+
+
+def encode_display_line(text):
+    """
+    Folds a line of text to characters the OP-1 can display.
+
+    Letters are lower-cased as upper-case ascii codes are drawn as icons,
+    accents are dropped, whitespace becomes a space and anything else
+    outside printable ascii becomes '?'.
+
+    Args:
+        text (str|unicode)
+    Returns:
+        bytearray: at most DISPLAY_LINE_MAX_LENGTH ascii codes
+    """
+    if isinstance(text, bytes):
+        text = text.decode('utf-8', 'replace')
+    text = text.strip()
+    if unicodedata is not None:
+        text = unicodedata.normalize('NFKD', text)
+    text = text.lower()
+
+    line = bytearray()
+    for c in text:
+        if unicodedata is not None and unicodedata.combining(c):
+            continue
+        code = ord(c)
+        if 0x20 <= code < 0x7f:
+            line.append(code)
+        elif c.isspace():
+            line.append(0x20)
+        else:
+            line.append(DISPLAY_UNKNOWN_CHAR)
+        if len(line) == DISPLAY_LINE_MAX_LENGTH:
+            break
+    return line
+
+
+class DisplayTextEncoder(object):
+    """
+    Encodes top and bottom display text into the payload of a text frame,
+    remembering recently used pairs so unchanged text costs no string work.
+    """
+    def __init__(self, max_size=TEXT_ENCODER_CACHE_SIZE):
+        self._payloads = LRUCache(max_size)
+        self._last_top_text = None
+        self._last_bottom_text = None
+        self._last_payload = None
+
+    def encode(self, top_text, bottom_text):
+        """
+        Returns:
+            bytearray: payload shared with later calls, must not be modified
+        """
+        # Fast path for idle renders, which repeat the previous text
+        if top_text == self._last_top_text and bottom_text == self._last_bottom_text:
+            return self._last_payload
+
+        key = (top_text, bottom_text)
+        payload = self._payloads.get(key)
+        if payload is None:
+            payload = encode_display_line(top_text)
+            payload.append(DISPLAY_LINE_SEPARATOR)
+            payload.extend(encode_display_line(bottom_text))
+            self._payloads.set(key, payload)
+
+        self._last_top_text = top_text
+        self._last_bottom_text = bottom_text
+        self._last_payload = payload
+        return payload
+
+
+class SysexFrame(object):
+    """
+    Reusable buffer for one type of display message:
+    `start_sequence + (count,) + payload + TEXT_END_SEQUENCE`
+
+    The start sequence is only written once, building a frame patches the
+    count and payload bytes in place.
+    """
+    def __init__(self, start_sequence, payload_length=0):
+        self._payload_offset = len(start_sequence) + 1
+        self._buffer = (
+            bytearray(start_sequence) +
+            bytearray(1 + payload_length) +
+            bytearray(TEXT_END_SEQUENCE)
+        )
+
+    @property
+    def buffer(self):
+        return self._buffer
+
+    def build(self, payload, count):
+        """
+        Args:
+            payload (bytearray|List[int]): message data bytes
+            count (int): number of items in payload, sent ahead of it
+        Returns:
+            bytearray: the frame buffer, valid until the next build
+        """
+        buffer = self._buffer
+        start = self._payload_offset
+        end = start + len(payload)
+        buffer[start - 1] = count
+        if end + 1 == len(buffer):
+            buffer[start:end] = payload
+        else:
+            # Payload length changed, resize everything past the count
+            buffer[start:] = payload
+            buffer.append(TEXT_END_SEQUENCE[0])
+        return buffer
+
+
+class DisplayFrameDiffer(object):
+    """
+    Remembers the last sysex frame sent on each display channel so that
+    views can render every tick while only changed frames reach the OP-1.
+    """
+    def __init__(self, send_midi):
+        """
+        Args:
+            send_midi (Callable[[tuple, str], None]): sends a changed frame,
+                given its display channel
+        """
+        self._send_midi = send_midi
+        self._last_frame_by_channel = {}
+
+    def invalidate(self):
+        """Forget all sent frames, forcing a full resync on next render"""
+        self._last_frame_by_channel.clear()
+
+    def send(self, channel, frame):
+        """
+        Args:
+            channel (str): display channel the frame belongs to
+            frame (bytearray): complete sysex message, may be reused by
+                the caller once this returns
+        Returns:
+            bool: True if the frame differed and was sent
+        """
+        last_frame = self._last_frame_by_channel.get(channel)
+        if last_frame == frame:
+            return False
+
+        if last_frame is None:
+            self._last_frame_by_channel[channel] = bytearray(frame)
+        else:
+            last_frame[:] = frame
+        self._send_midi(tuple(frame), channel)
+        return True
+
 
 class OP1View(object):
     def __init__(self, surface):
@@ -21,12 +197,15 @@ class OP1View(object):
 
         self._bottom_text = ''
         self._top_text = ''
-        self.display_color_by_slot_num = {
-            i: COLOR_BLACK_BYTES for i in range(NUM_DISPLAY_CLIP_SLOTS)
-        }
+        # RGB bytes of every key slot, back to back
+        self.display_colors = bytearray(3 * NUM_DISPLAY_CLIP_SLOTS)
 
-    def log_message(self, msg):
-        self.surface.log_message(msg)
+        self._text_frame = SysexFrame(TEXT_START_SEQUENCE)
+        self._color_frame = SysexFrame(TEXT_COLOR_START_SEQUENCE, len(self.display_colors))
+
+    @property
+    def logger(self):
+        return self.surface.logger
 
     @property
     def surface(self):
@@ -46,6 +225,10 @@ class OP1View(object):
         """Override in sub-classes"""
         raise NotImplementedError()
 
+    def request_frame(self):
+        """Renders on the next display update, e.g. from scheduled tasks"""
+        self.surface.frame_governor.request_frame()
+
     def set_top_text(self, top_text):
         self._top_text = top_text
 
@@ -56,17 +239,14 @@ class OP1View(object):
         """
         Args:
             slot_num (int): key slot to set color on
-            color_bytes (List[int]): Use `color_to_bytes` to generate these
+            color_bytes (Tuple[int]): Use `color_to_bytes` to generate these
         """
-        self.display_color_by_slot_num[slot_num] = color_bytes
+        offset = 3 * slot_num
+        self.display_colors[offset:offset + 3] = color_bytes
 
     def _sync_key_colors_to_display(self):
-        colors = []
-        for i in range(NUM_DISPLAY_CLIP_SLOTS):
-            key_color_bytes = self.display_color_by_slot_num[i]
-            colors.extend(key_color_bytes)
-        sequence = TEXT_COLOR_START_SEQUENCE + (NUM_DISPLAY_CLIP_SLOTS, ) + tuple(colors) + TEXT_END_SEQUENCE
-        self.surface._send_midi(sequence)
+        frame = self._color_frame.build(self.display_colors, NUM_DISPLAY_CLIP_SLOTS)
+        self.surface.display_frames.send(DISPLAY_COLOR_CHANNEL, frame)
 
     def _sync_text_to_display(self):
         """
@@ -74,12 +254,12 @@ class OP1View(object):
 
         Use lower-case ascii chars for normal letters.
         Uppercase will be encoded as custom icons.
+
+        See `encode_display_line` for how text is folded.
         """
-        msg = self._top_text.strip() + '\r' + self._bottom_text.strip()
-        msg = msg.lower()
-        text_bytes = [ord(c) for c in msg]
-        sequence = TEXT_START_SEQUENCE + (len(msg), ) + tuple(text_bytes) + TEXT_END_SEQUENCE
-        self.surface._send_midi(sequence)
+        payload = self.surface.display_text_encoder.encode(self._top_text, self._bottom_text)
+        frame = self._text_frame.build(payload, len(payload))
+        self.surface.display_frames.send(DISPLAY_TEXT_CHANNEL, frame)
 
 
 class ApplicationView(OP1View):
@@ -90,7 +270,7 @@ class ApplicationView(OP1View):
 
         self.active_view = self.current_track_view
 
-        self.flash_expire_ts = None
+        self.flash_task = None
         self.flash_return_view = None
 
     def flash(self, view, duration):
@@ -100,15 +280,17 @@ class ApplicationView(OP1View):
             self.flash_return_view = self.active_view
 
         self.active_view = view
-        self.flash_expire_ts = time.time() + duration
+        self.surface.scheduler.cancel(self.flash_task)
+        self.flash_task = self.surface.scheduler.call_later(duration, self.end_flash)
+        self.request_frame()
 
-    def update(self):
-        # Check for flash view expiring
-        if self.flash_return_view is not None and time.time() >= self.flash_expire_ts:
-            self.active_view = self.flash_return_view
-            self.flash_expire_ts = None
-            self.flash_return_view = None
+    def end_flash(self):
+        self.active_view = self.flash_return_view
+        self.flash_task = None
+        self.flash_return_view = None
+        self.request_frame()
 
+    def update(self):
         self.active_view.update()
 
 
@@ -119,48 +301,104 @@ class CurrentTrackInfoView(OP1View):
     - Mute/Solo/Arm status
     - Clips w/ colors for the track
     - Selected clip indicated with WHITE slot indicator
+    - Clip page, briefly, when the selection moves to another page
+
+    Track state is read from the surface's `SelectedTrackModel`.
     """
+    def __init__(self, surface):
+        super(CurrentTrackInfoView, self).__init__(surface)
+        self._displayed_track_info = None
+        self._track_status_text = ''
+
+        self._displayed_page = None
+        self._page_indicator_task = None
+
+        self._selection_blink = BlinkPhase(surface.scheduler, self.request_frame)
+        self._blinking_slot_num = None
+
+    @property
+    def model(self):
+        return self.surface.selected_track_model
+
     def update(self):
         self.display_track_info()
+        self.display_page_indicator()
         self.display_selected_track_clips()
 
     def display_track_info(self):
-        selected_track = self.surface.selected_track
-        self.set_top_text('%s. %s' % (
-            self.surface.selected_track_num,
-            selected_track.name,
-        ))
+        model = self.model
+        track_num = self.surface.selected_track_num
+        track_info = (
+            track_num,
+            model.revision(TRACK_NAME, TRACK_MUTE, TRACK_SOLO, TRACK_ARM),
+        )
+        # Text only needs rebuilding when the track or its state changed
+        if track_info == self._displayed_track_info:
+            return
+        self._displayed_track_info = track_info
+
+        # Return and master tracks are shown without a number
+        if track_num is None:
+            self.set_top_text(model.name)
+        else:
+            self.set_top_text('%s. %s' % (track_num, model.name))
 
         track_attrs = []
-        if selected_track.mute:
+        if model.mute:
             track_attrs.append('Muted')
-        if selected_track.solo:
+        if model.solo:
             track_attrs.append('Solo')
-        if selected_track.arm:
+        if model.arm:
             track_attrs.append('Armed')
 
         bottom_text = 'Track'
         if track_attrs:
             bottom_text += ': ' + ','.join(track_attrs)
-        self.set_bottom_text(bottom_text)
+        self._track_status_text = bottom_text
+
+    def display_page_indicator(self):
+        """Shows the clip page in place of the track status after a page change"""
+        model = self.model
+        if model.window_page != self._displayed_page:
+            # No indicator for the initial page
+            if self._displayed_page is not None:
+                scheduler = self.surface.scheduler
+                scheduler.cancel(self._page_indicator_task)
+                self._page_indicator_task = scheduler.call_later(PAGE_INDICATOR_DURATION, self.hide_page_indicator)
+            self._displayed_page = model.window_page
+
+        if self._page_indicator_task is not None:
+            self.set_bottom_text('Page %s/%s' % (model.window_page + 1, model.num_pages))
+        else:
+            self.set_bottom_text(self._track_status_text)
+
+    def hide_page_indicator(self):
+        self._page_indicator_task = None
+        self.request_frame()
 
     def display_selected_track_clips(self):
-        selected_track = self.surface.selected_track
-        selected_scene_num = self.surface.selected_scene_num
-        num_clip_slots = len(selected_track.clip_slots)
-
-        colors = []
-
-        # Alternate indicator every half second
-        now_ms = time.time() * 1000
-        show_selection_indicator = (now_ms % 1000) > 500
-
-        for i, clip_slot in enumerate(selected_track.clip_slots):
-            if i == selected_scene_num and show_selection_indicator:
+        clip_colors = self.model.clip_colors
+        # Position of the selected scene within the displayed page
+        selected_slot_num = self.surface.selected_scene_num - self.model.window_start
+        num_clip_slots = len(clip_colors)
+
+        # Alternate indicator every half second, starting shown when the
+        # selection moves. No frames are scheduled for it when off page.
+        show_selection_indicator = False
+        if 0 <= selected_slot_num < num_clip_slots:
+            if selected_slot_num != self._blinking_slot_num:
+                self._blinking_slot_num = selected_slot_num
+                self._selection_blink.restart()
+            show_selection_indicator = self._selection_blink.is_on()
+        else:
+            self._blinking_slot_num = None
+            self._selection_blink.stop()
+
+        for i, clip_color in enumerate(clip_colors):
+            if i == selected_slot_num and show_selection_indicator:
                 self.set_key_slot_color(i, COLOR_WHITE_BYTES)
 
-            elif clip_slot is not None and clip_slot.has_clip:
-                clip_color = clip_slot.clip.color
+            elif clip_color is not None:
                 color_bytes = color_to_bytes(clip_color)
                 self.set_key_slot_color(i, color_bytes)
 
@@ -175,6 +413,8 @@ class CurrentTrackEffectsView(OP1View):
     def __init__(self, surface):
         super(CurrentTrackEffectsView, self).__init__(surface)
         self._param = None
+        self._bank_num = 0
+        self._num_banks = 1
 
     def update(self):
         self.display_device_info()
@@ -183,8 +423,13 @@ class CurrentTrackEffectsView(OP1View):
     def param(self):
         return self._param
 
+    def set_bank(self, bank_num, num_banks):
+        self._bank_num = bank_num
+        self._num_banks = num_banks
+
     def set_displayed_device_param(self, param):
-        self.log_message('set_displayed_device_param: %s' % (param.name if param else 'None'))
+        if self.logger.debug_enabled:
+            self.logger.debug('set_displayed_device_param: %s', param.name if param else 'None')
         self._param = param
 
     def format_param_value_for_dispay(self, param):
@@ -198,7 +443,10 @@ class CurrentTrackEffectsView(OP1View):
 
     def display_device_info(self):
         device = self.surface.selected_device
-        self.set_top_text('%s' % device.name)
+        if self._num_banks > 1:
+            self.set_top_text('%s %d/%d' % (device.name, self._bank_num + 1, self._num_banks))
+        else:
+            self.set_top_text('%s' % device.name)
 
         if self.param is not None:
             self.set_bottom_text(self.format_param_value_for_dispay(self.param))
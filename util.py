@@ -1,19 +1,141 @@
 
+import time
+from collections import OrderedDict
+
+
+def steady_clock(wall_time):
+    """
+    Builds a clock that never goes back from one that may step, e.g. the
+    wall clock on NTP corrections. Only forward movement of `wall_time` is
+    added up, so after a step back time keeps moving from where it was.
+
+    Args:
+        wall_time (Callable[[], float]): seconds, may step back
+    Returns:
+        Callable[[], float]: seconds from an arbitrary point
+    """
+    # Previous reading of `wall_time`, and time added up so far
+    state = [wall_time(), 0.0]
+
+    def clock():
+        now = wall_time()
+        state[1] += max(0.0, now - state[0])
+        state[0] = now
+        return state[1]
+
+    return clock
+
+
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    # Python 2 has no monotonic clock in the standard library
+    monotonic = steady_clock(time.time)
+
 # Provides many constants
 from _Framework.InputControlElement import *
 
+# Live's clip color palette, as RGB ints
+LIVE_CLIP_COLORS = (
+    15549221, 12411136, 11569920, 8754719, 5480241, 695438, 31421, 197631,
+    3101346, 6441901, 8092539, 3947580, 16712965, 12565097, 10927616, 8046132,
+    4047616, 49071, 1090798, 5538020, 8940772, 10701741, 12008809, 9852725,
+    16149507, 12581632, 8912743, 1769263, 2490280, 6094824, 1698303, 9160191,
+    9611263, 12094975, 14183652, 16726484, 16753961, 16773172, 14939139, 14402304,
+    12492131, 9024637, 8962746, 10204100, 8758722, 13011836, 15810688, 16749734,
+    16753524, 16772767, 13821080, 12243060, 11119017, 13958625, 13496824, 12173795,
+    13482980, 13684944, 14673637, 16777215,
+)
+
+# Number of colors outside the palette remembered by `color_to_bytes`
+COLOR_MEMO_SIZE = 64
+
+
+class LRUCache(object):
+    """
+    Mapping that keeps at most `max_size` entries, evicting the least
+    recently used one when full.
+    """
+    def __init__(self, max_size, on_evict=None):
+        """
+        Args:
+            on_evict (Callable[[object, object], None]): called with the key
+                and value of each evicted entry
+        """
+        self._max_size = max_size
+        self._on_evict = on_evict
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            return default
+        # Re-insert to mark as most recently used
+        self._entries[key] = value
+        return value
+
+    def set(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        if len(self._entries) > self._max_size:
+            evicted = self._entries.popitem(last=False)
+            if self._on_evict is not None:
+                self._on_evict(*evicted)
+
+    def pop(self, key, default=None):
+        return self._entries.pop(key, default)
+
+    def values(self):
+        return list(self._entries.values())
+
+    def clear(self):
+        self._entries.clear()
+
+
+def _convert_color_to_bytes(color):
+    return (
+        ((color >> 16) & 0x000000ff) >> 1,
+        ((color >> 8) & 0x000000ff) >> 1,
+        (color & 0x000000ff) >> 1,
+    )
+
+
+COLOR_BYTES_BY_PALETTE_COLOR = {
+    color: _convert_color_to_bytes(color) for color in LIVE_CLIP_COLORS
+}
+
+_color_bytes_memo = LRUCache(COLOR_MEMO_SIZE)
+
+
 def color_to_bytes(color):
     """
+    Palette colors are looked up in a precomputed table, other colors are
+    memoized in a small LRU cache.
+
     Args:
         color (int)
     Returns:
-        List[int]
+        Tuple[int]: 7-bit red, green and blue values
     """
-    return [
-        ((color >> 16) & 0x000000ff) >> 1,
-        ((color >> 8) & 0x000000ff) >> 1,
-        (color & 0x000000ff) >> 1,
-    ]
+    color_bytes = COLOR_BYTES_BY_PALETTE_COLOR.get(color)
+    if color_bytes is None:
+        color_bytes = _color_bytes_memo.get(color)
+        if color_bytes is None:
+            color_bytes = _convert_color_to_bytes(color)
+            _color_bytes_memo.set(color, color_bytes)
+    return color_bytes
+
+
+def relative_cc_to_delta(value):
+    """Decodes a relative two's complement CC value, e.g. 1 -> 1, 127 -> -1"""
+    return value - 128 if value >= 64 else value
 
 
 def midi_bytes_to_values(midi_bytes):